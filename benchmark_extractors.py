@@ -0,0 +1,87 @@
+import os
+import ast
+import sys
+import time
+from src.logic.project_manager import ProjectManager, PARSE_FILENAME
+
+# Each extractor runs this many times over all files; the best run is reported
+REPEAT = 3
+
+
+def load_python_files(pm):
+    """(file, content, lines) of every loaded .py file, read up front so only extraction is timed."""
+    files = []
+    for f in pm.get_files():
+        if f.get('skip') or not f['path'].lower().endswith('.py'):
+            continue
+        content = pm.get_file_content(f)
+        files.append((f, content, content.split('\n')))
+    return files
+
+
+def time_extractor(extract, files):
+    """Returns (best total seconds, extracted records of the last run)."""
+    best = None
+    for _ in range(REPEAT):
+        records = []
+        t_start = time.perf_counter()
+        for f, content, lines in files:
+            records.extend(extract(f, content, lines))
+        elapsed = time.perf_counter() - t_start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, records
+
+
+def count_unparsable(files):
+    """Files the ast extractor hands over to the regex fallback."""
+    failed = 0
+    for _, content, _ in files:
+        try:
+            ast.parse(content, filename=PARSE_FILENAME)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            failed += 1
+    return failed
+
+
+def compare(regex_records, ast_records):
+    """Compares the definitions both extractors found, by (file, definition line)."""
+    by_regex = {(r.file_rel_path, r.line): r for r in regex_records}
+    by_ast = {(r.file_rel_path, r.line): r for r in ast_records}
+    both = by_regex.keys() & by_ast.keys()
+    same_span = sum(1 for key in both if by_regex[key].end_line == by_ast[key].end_line)
+    return {
+        'both': len(both),
+        'only regex': len(by_regex.keys() - by_ast.keys()),
+        'only ast': len(by_ast.keys() - by_regex.keys()),
+        'same end line': same_span,
+        'qualified': sum(1 for r in ast_records if '.' in r.name),
+        'decorated': sum(1 for r in ast_records if r.decorator_lines),
+    }
+
+
+def main():
+    project_path = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+    pm = ProjectManager()
+    pm.load_project(project_path)
+    files = load_python_files(pm)
+    if not files:
+        print("No hay ficheros Python en este proyecto.")
+        return
+    total_lines = sum(len(lines) for _, _, lines in files)
+    print(f"\n{len(files)} Python files, {total_lines} lines, best of {REPEAT} runs\n")
+
+    regex_extract = lambda f, content, lines: pm._extract_python_functions_regex(f, lines)
+    results = {}
+    print(f"{'extractor':<12}{'total ms':>10}{'us/file':>10}{'functions':>11}")
+    for name, extract in (('regex', regex_extract), ('ast', pm._extract_python_functions)):
+        elapsed, records = time_extractor(extract, files)
+        results[name] = records
+        print(f"{name:<12}{elapsed * 1000:>10.1f}{elapsed * 1e6 / len(files):>10.1f}{len(records):>11}")
+
+    print(f"\nFiles falling back to the regex: {count_unparsable(files)}")
+    for key, value in compare(results['regex'], results['ast']).items():
+        print(f"{key:<16}{value:>8}")
+
+
+if __name__ == "__main__":
+    main()
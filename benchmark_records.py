@@ -0,0 +1,47 @@
+import os
+import sys
+from src.logic.project_manager import ProjectManager
+
+
+def measure_file_records(records):
+    """
+    Estimates the memory of a list of FileRecords and of the equivalent dicts.
+    Returns (records_bytes, dicts_bytes). Strings shared between objects are counted once.
+    """
+    seen = set()
+
+    def _size(obj):
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return sys.getsizeof(obj)
+
+    records_bytes = 0
+    for r in records:
+        records_bytes += _size(r) + _size(r.path) + _size(r._dir) + _size(r.name) + _size(r.size) + _size(r.mtime)
+
+    seen.clear()
+    # Kept alive until the end so ids are not reused while measuring
+    dicts = [{'path': r.path, 'rel_path': r.rel_path, 'size': r.size, 'mtime': r.mtime} for r in records]
+    dicts_bytes = 0
+    for d in dicts:
+        dicts_bytes += _size(d) + sum(_size(v) for v in d.values())
+    return records_bytes, dicts_bytes
+
+
+def main():
+    project_path = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+    pm = ProjectManager()
+    pm.load_project(project_path)
+    records_bytes, dicts_bytes = measure_file_records(pm.get_files())
+    if not dicts_bytes:
+        print("No hay ficheros en este proyecto.")
+        return
+    print(
+        f"\n{len(pm.get_files())} files: records {records_bytes / 1024:.1f} KB, "
+        f"as dicts {dicts_bytes / 1024:.1f} KB ({100 * (1 - records_bytes / dicts_bytes):.0f}% saved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
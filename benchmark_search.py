@@ -0,0 +1,109 @@
+import os
+import re
+import sys
+import time
+import statistics
+from src.logic.project_manager import ProjectManager
+from src.logic.ranking import RANKERS, NUMPY_AVAILABLE
+
+# Maximum number of queries generated from the project
+MAX_QUERIES = 200
+
+
+def split_identifier(name):
+    """Splits snake_case / camelCase identifiers into lowercase words."""
+    words = []
+    for part in name.split('_'):
+        words.extend(re.findall(r'[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])', part))
+    return [w.lower() for w in words if len(w) >= 3]
+
+
+def build_queries(pm, by_name=False):
+    """
+    Builds (query, expected rel_path) pairs from the project's own functions:
+    the words of a function name (or the name itself, if by_name) should find
+    the file that defines it. Only names defined in a single file are used.
+    """
+    defined_in = {}
+    for fn in pm.extract_functions():
+        name = fn['name'].rsplit('.', 1)[-1] # Methods come qualified ('Class.method')
+        defined_in.setdefault(name, set()).add(fn['file_rel_path'])
+
+    queries = []
+    for name in sorted(defined_in):
+        words = split_identifier(name)
+        if len(defined_in[name]) == 1 and len(words) >= 2:
+            queries.append((name if by_name else " ".join(words), next(iter(defined_in[name]))))
+    step = max(1, len(queries) // MAX_QUERIES)
+    return queries[::step][:MAX_QUERIES]
+
+
+def linear_search(pm, query):
+    """The scorer before the search index: a full scan of every file's content."""
+    tokens = [t for t in set(query.lower().split()) if len(t) >= 3]
+    scored = []
+    for f in pm.get_files():
+        if f.get('skip'):
+            continue
+        score = pm._keyword_score_file(f, tokens)
+        if score > 0:
+            scored.append((score, f))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [f for _, f in scored]
+
+
+def evaluate(search, queries):
+    """Returns latency (ms) and quality stats of a search function over the queries."""
+    latencies = []
+    reciprocal_ranks = []
+    hits_1 = hits_5 = 0
+    for query, expected in queries:
+        t_start = time.perf_counter()
+        results = search(query)
+        latencies.append((time.perf_counter() - t_start) * 1000)
+
+        ranked = [f['rel_path'] for f in results]
+        rank = ranked.index(expected) + 1 if expected in ranked else None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        hits_1 += rank == 1
+        hits_5 += rank is not None and rank <= 5
+
+    latencies.sort()
+    n = len(queries)
+    return {
+        'mean': statistics.mean(latencies),
+        'p95': latencies[min(n - 1, int(n * 0.95))],
+        'mrr': statistics.mean(reciprocal_ranks),
+        'hit@1': hits_1 / n,
+        'hit@5': hits_5 / n,
+    }
+
+
+def main():
+    project_path = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+    pm = ProjectManager()
+    pm.load_project(project_path)
+
+    searches = {'linear (before index)': lambda q: linear_search(pm, q)}
+    for name in RANKERS:
+        searches[f"{name} (no proximity)"] = lambda q, name=name: pm.search_files(q, ranker=name, proximity=False)[0]
+        searches[name] = lambda q, name=name: pm.search_files(q, ranker=name, proximity=True)[0]
+
+    for title, by_name in (("Words of function names", False), ("Function names", True)):
+        queries = build_queries(pm, by_name)
+        if not queries:
+            print("No se han podido generar consultas para este proyecto.")
+            return
+        print(f"\n{title}: {len(queries)} queries, {len(pm.get_files())} files, NumPy {'on' if NUMPY_AVAILABLE else 'off'}\n")
+
+        print(f"{'scorer':<24}{'mean ms':>9}{'p95 ms':>9}{'MRR':>8}{'hit@1':>8}{'hit@5':>8}")
+        for name, search in searches.items():
+            stats = evaluate(search, queries)
+            print(
+                f"{name:<24}{stats['mean']:>9.2f}{stats['p95']:>9.2f}"
+                f"{stats['mrr']:>8.3f}{stats['hit@1']:>8.2f}{stats['hit@5']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -52,6 +52,8 @@ class Application:
         self.root.bind("<Command-f>", self._open_search_overlay)
         self.root.bind("<Command-F>", self._open_search_overlay)
 
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # Auto-load project
         dirs = self.controller.config_manager.get_project_directories()
         if dirs:
@@ -73,6 +75,14 @@ class Application:
         self._search_overlay = SearchOverlay(self.root, self.controller)
         return "break"
 
+    def _on_close(self):
+        """Stops the controller's background work (grep worker processes, watcher...) and closes the window."""
+        try:
+            self.controller.shutdown()
+        except Exception as e:
+            print(f"Application: Error shutting down: {e}")
+        self.root.destroy()
+
     def run(self):
         """
         Start the main event loop.
@@ -85,6 +85,90 @@ class ConfigManager:
         self.config["file_limit"] = int(limit)
         self.save_config()
 
+    def get_scan_workers(self):
+        """Returns the number of threads used to read project files, defaulting to 8."""
+        return self.config.get("scan_workers", 8)
+
+    def set_scan_workers(self, workers):
+        """Sets the number of threads used to read project files and saves config."""
+        self.config["scan_workers"] = max(1, int(workers))
+        self.save_config()
+
+    def get_content_cache_mb(self):
+        """Returns the memory budget (MB) for cached file contents, defaulting to 64."""
+        return self.config.get("content_cache_mb", 64)
+
+    def set_content_cache_mb(self, megabytes):
+        """Sets the memory budget (MB) for cached file contents and saves config."""
+        self.config["content_cache_mb"] = max(1, int(megabytes))
+        self.save_config()
+
+    def get_watch_project(self):
+        """Returns whether the loaded project is watched for changes, defaulting to True."""
+        return self.config.get("watch_project", True)
+
+    def set_watch_project(self, value):
+        """Sets whether the loaded project is watched for changes and saves config."""
+        self.config["watch_project"] = bool(value)
+        self.save_config()
+
+    def get_watch_poll_interval(self):
+        """Returns the polling interval (seconds) used when no native watcher is available."""
+        return self.config.get("watch_poll_interval", 2.0)
+
+    def get_exclude_patterns(self):
+        """Returns extra gitignore-style patterns excluded from every project scan."""
+        return self.config.get("exclude_patterns", [])
+
+    def set_exclude_patterns(self, patterns):
+        """Sets the extra scan exclude patterns and saves config."""
+        self.config["exclude_patterns"] = list(patterns)
+        self.save_config()
+
+    def get_scan_overrides(self, project_path):
+        """Returns the glob patterns of files always fully ingested for a project, even if binary/minified/large."""
+        return self.config.get("scan_overrides", {}).get(project_path, [])
+
+    def set_scan_overrides(self, project_path, patterns):
+        """Sets the full-ingest override patterns of a project and saves config."""
+        overrides = self.config.get("scan_overrides", {})
+        overrides[project_path] = list(patterns)
+        self.config["scan_overrides"] = overrides
+        self.save_config()
+
+    def get_search_ranker(self):
+        """Returns the ranker used to sort relevant files ('keyword', 'bm25' or 'tfidf'), defaulting to 'keyword'."""
+        return self.config.get("search_ranker", "keyword")
+
+    def set_search_ranker(self, ranker):
+        """Sets the ranker used to sort relevant files and saves config."""
+        self.config["search_ranker"] = ranker
+        self.save_config()
+
+    def get_query_cache_size(self):
+        """Returns how many search results are kept in the query cache, defaulting to 64."""
+        return self.config.get("query_cache_size", 64)
+
+    def get_proximity_scoring(self):
+        """Returns whether searches re-rank the top files by phrase/proximity, defaulting to True."""
+        return self.config.get("proximity_scoring", True)
+
+    def get_grep_workers(self):
+        """Returns the number of processes used by grep searches, defaulting to the CPU count."""
+        return self.config.get("grep_workers", os.cpu_count() or 1)
+
+    def get_grep_max_hits(self):
+        """Returns how many hits a grep search shows before stopping, defaulting to 500."""
+        return self.config.get("grep_max_hits", 500)
+
+    def get_resident_projects(self):
+        """Returns how many recently used projects are kept loaded in memory, defaulting to 2."""
+        return self.config.get("resident_projects", 2)
+
+    def get_resident_memory_mb(self):
+        """Returns the memory cap (MB) for projects kept loaded in the background, defaulting to 256."""
+        return self.config.get("resident_memory_mb", 256)
+
     def get_return_regions(self):
         """Returns whether to return regions, defaulting to False."""
         return self.config.get("return_regions", False)
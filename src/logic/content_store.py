@@ -0,0 +1,95 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def read_file_bytes(full_path):
+    """Reads a file as raw bytes. Returns None if it cannot be read."""
+    try:
+        with open(full_path, 'rb') as f:
+            return f.read()
+    except Exception as e:
+        print(f"Error reading file {full_path}: {e}")
+        return None
+
+
+def decode_content(data):
+    """
+    Decodes raw file bytes exactly like open(..., 'r', encoding='utf-8', errors='ignore'),
+    including universal newline translation.
+    """
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+class ContentStore:
+    """
+    Lazy, byte-budgeted cache of decoded file contents.
+
+    Project files only keep metadata; their text is loaded from disk on first
+    access and kept in an LRU that evicts the least recently used entries once
+    the byte budget is exceeded. Safe to use from the search threads.
+    """
+
+    def __init__(self, byte_budget):
+        self.byte_budget = int(byte_budget)
+        self._entries = OrderedDict() # {path: str}
+        self._used_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def used_bytes(self):
+        return self._used_bytes
+
+    def get(self, path):
+        """Returns the decoded content of path, loading it from disk if needed."""
+        with self._lock:
+            content = self._entries.get(path)
+            if content is not None:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return content
+            self.misses += 1
+
+        data = read_file_bytes(path)
+        if data is None:
+            return ""
+        content = decode_content(data)
+        self.put(path, content)
+        return content
+
+    def put(self, path, content):
+        """Stores content for path, evicting old entries to stay within budget."""
+        size = sys.getsizeof(content)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._used_bytes -= sys.getsizeof(old)
+            if size > self.byte_budget:
+                # Too big to cache, callers still get the content from get()
+                return
+            self._entries[path] = content
+            self._used_bytes += size
+            while self._used_bytes > self.byte_budget and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._used_bytes -= sys.getsizeof(evicted)
+
+    def contains(self, path):
+        with self._lock:
+            return path in self._entries
+
+    def discard(self, path):
+        """Drops the cached content of path (e.g. after it changed on disk)."""
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._used_bytes -= sys.getsizeof(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used_bytes = 0
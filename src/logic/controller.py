@@ -3,8 +3,14 @@ from src.logic.project_manager import ProjectManager
 from src.logic.section_manager import SectionManager
 from src.logic.config_manager import ConfigManager
 from src.logic.global_hotkeys import GlobalHotkeyListener
+from src.logic.project_watcher import ProjectWatcher
+from src.logic.query_cache import QueryCache
+from src.logic.query_parser import parse_query
+from src.logic.grep_engine import GrepEngine
+from src.logic.search_worker import SearchWorker
 from src.ui.styles import Styles
 import os
+import re
 import pyperclip
 import importlib
 
@@ -32,12 +38,20 @@ class Controller:
         self.project_manager = ProjectManager(self.config_manager)
         self.section_manager = SectionManager(self.project_manager)
         self.hotkey_listener = GlobalHotkeyListener(self)
+        self.project_watcher = None
+        self.query_cache = QueryCache(self.config_manager.get_query_cache_size())
+        self.grep_engine = None # Created on the first grep search
+        self.symbol_worker = SearchWorker("symbols") # Builds the function list off the Tk thread
 
     def load_project_folder(self, path):
         """Loads a project folder and updates the UI."""
         print(f"Controller: Loading project from {path}")
         try:
+            self._stop_project_watcher()
             self.project_manager.load_project(path)
+            self._start_project_watcher()
+            self.prepare_functions()
+            self._prewarm_neighbour_projects(path)
             # Save to config
             self.config_manager.set_last_project(path)
             
@@ -53,6 +67,51 @@ class Controller:
         except Exception as e:
             print(f"Error loading project: {e}")
 
+    def shutdown(self):
+        """Stops background work before the app exits: watcher, worker threads and processes, hotkeys and pending cache saves."""
+        self._stop_project_watcher()
+        self.symbol_worker.stop()
+        if self.grep_engine is not None:
+            self.grep_engine.shutdown()
+            self.grep_engine = None
+        self.hotkey_listener.stop()
+        self.project_manager.flush_scan_cache()
+
+    def _start_project_watcher(self):
+        """Starts watching the loaded project so external edits are applied incrementally."""
+        if not self.config_manager.get_watch_project():
+            return
+        self.project_watcher = ProjectWatcher(
+            self.project_manager,
+            on_change=self._on_project_files_changed,
+            poll_interval=self.config_manager.get_watch_poll_interval()
+        )
+        self.project_watcher.start()
+
+    def _stop_project_watcher(self):
+        if self.project_watcher:
+            self.project_watcher.stop()
+            self.project_watcher = None
+
+    def _on_project_files_changed(self, summary):
+        """Called from the watcher thread after deltas were applied to the project."""
+        if hasattr(self.app, 'layout') and hasattr(self.app.layout, 'code_view'):
+            code_view = self.app.layout.code_view
+            code_view.after(0, lambda: code_view.on_project_files_changed(summary))
+
+    def _prewarm_neighbour_projects(self, path):
+        """Pre-loads the next and previous projects of the ring in the background."""
+        dirs = self.config_manager.get_project_directories()
+        if len(dirs) <= 1 or path not in dirs:
+            return
+        idx = dirs.index(path)
+        neighbours = []
+        for offset in (1, -1):
+            candidate = dirs[(idx + offset) % len(dirs)]
+            if candidate != path and candidate not in neighbours:
+                neighbours.append(candidate)
+        self.project_manager.prewarm_projects(neighbours)
+
     def get_project_directories(self):
         """Returns the list of registered project directories."""
         return self.config_manager.get_project_directories()
@@ -107,32 +166,21 @@ class Controller:
         """
         # Determine scope
         if file_paths is not None:
-            all_files = self.project_manager.get_files()
-            files_map = {f['path']: f for f in all_files}
-            relevant_files = [files_map[p] for p in file_paths if p in files_map]
+            relevant_files = self.project_manager.get_files_by_paths(file_paths)
         else:
             if selected_section:
                 section_files_list = self.section_manager.get_files_in_section(selected_section)
-                # Filter all loaded files to just those in the section
-                all_files = self.project_manager.get_files()
-                
-                # Create a lookup for all files {path: file_obj} for O(1) access
-                files_map = {f['path']: f for f in all_files}
-                
-                # Build relevant_files list ensuring order from section_files_list
-                relevant_files = []
-                for path in section_files_list:
-                    if path in files_map:
-                        relevant_files.append(files_map[path])
+                # Filter loaded files to just those in the section, keeping the section order
+                relevant_files = self.project_manager.get_files_by_paths(section_files_list)
             else:
-                # Search everything using relevant files finding
-                relevant_files = self.project_manager.find_relevant_files(user_text)
+                # Search everything using relevant files finding (only the files that fit the limit)
+                relevant_files = self.project_manager.search_files(user_text, k=file_limit)[0]
         
         # Build Prompt
         prompt = f"Petición del Usuario: {user_text}\n\nArchivos de Contexto:\n"
         for f in relevant_files[:file_limit]: # Limit to slider value
             prompt += f"\n--- Archivo: {f['rel_path']} ---\n"
-            prompt += f.get('content', '') + "\n"
+            prompt += self.project_manager.get_file_content(f) + "\n"
         
         # Include table samples if section has tables
         if selected_section:
@@ -246,36 +294,75 @@ class Controller:
                 except:
                     pass
 
-    def get_relevant_files_for_ui(self, user_text, selected_section=None, extension=""):
-        """Helper to get relevant files for UI display."""
-        all_files = self.project_manager.get_files()
+    def get_relevant_files_for_ui(self, user_text, selected_section=None, extension="", should_cancel=None, limit=None):
+        """
+        Helper to get relevant files for UI display.
+        Only the first `limit` files (None = all) are returned; the search picks them
+        with a top-k selection instead of ranking every match.
+        Results are cached by normalized query, section, extension filter, limit and
+        project generation (see query_cache_key).
+        should_cancel (optional callable) lets a background search stop early (raises SearchCancelled).
         
+        Returns:
+            (files, total number of matching files)
+        """
+        section_files_paths = self.section_manager.get_files_in_section(selected_section) if selected_section else None
+        ext_list = self._parse_extension_filter(extension)
+        key = self.query_cache_key(user_text, section_files_paths, ext_list) + (limit,)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+
         # 1. Scope Filtering (Section or Global)
-        if selected_section:
-            section_files_paths = self.section_manager.get_files_in_section(selected_section)
-            files_map = {f['path']: f for f in all_files}
-            base_files = [files_map[p] for p in section_files_paths if p in files_map]
+        if not selected_section and user_text:
+            # Extension filtering happens inside the search, before the top files are picked
+            result = self.project_manager.search_files(
+                user_text, k=limit, extensions=ext_list, should_cancel=should_cancel
+            )
         else:
-            if not user_text:
-                base_files = all_files
+            if selected_section:
+                base_files = self.project_manager.get_files_by_paths(section_files_paths)
             else:
-                base_files = self.project_manager.find_relevant_files(user_text)
-
-        # 2. Extension Filtering (Support multiple comma-separated extensions)
-        if extension and extension.strip():
-            # Parse extensions: split by comma, strip whitespace, ensure dot prefix
-            ext_list = []
-            for e in extension.split(','):
-                e = e.strip().lower()
-                if e:
-                    if not e.startswith('.'):
-                        e = '.' + e
-                    ext_list.append(e)
-            
+                base_files = self.project_manager.get_files()
+
+            # 2. Extension Filtering (Support multiple comma-separated extensions)
             if ext_list:
-                base_files = [f for f in base_files if any(f['rel_path'].lower().endswith(ext) for ext in ext_list)]
-            
-        return base_files
+                base_files = [f for f in base_files if f['rel_path'].lower().endswith(ext_list)]
+            result = (base_files[:limit], len(base_files))
+
+        self.query_cache.put(key, result)
+        return result
+
+    def query_cache_key(self, user_text, section_files_paths, ext_list):
+        """
+        Cache key of a UI search. Queries are normalized to their parsed clauses
+        (in order, which matters for phrase scoring); the project generation changes
+        whenever files are rescanned or changed on disk, which retires older entries.
+        The ranker and proximity settings are part of the key, since they change the order.
+        """
+        pm = self.project_manager
+        tokens = parse_query(user_text).key() if user_text else None
+        section = tuple(section_files_paths) if section_files_paths is not None else None
+        return (
+            pm.current_project_path, pm.generation, self.config_manager.get_search_ranker(),
+            self.config_manager.get_proximity_scoring(), tokens, section, ext_list
+        )
+
+    @staticmethod
+    def _parse_extension_filter(extension):
+        """Parses "py, .js" into ('.py', '.js'): split by comma, strip whitespace, ensure dot prefix."""
+        ext_list = []
+        for e in (extension or "").split(','):
+            e = e.strip().lower()
+            if e:
+                if not e.startswith('.'):
+                    e = '.' + e
+                ext_list.append(e)
+        return tuple(ext_list)
+
+    def get_query_cache_stats(self):
+        """Returns the hit/miss counters of the UI search cache."""
+        return self.query_cache.stats()
 
     def show_code_view(self):
         """
@@ -317,13 +404,13 @@ class Controller:
 
     def get_file_content_by_path(self, path):
         """Returns the content and relative path of a file given its absolute path."""
-        for f in self.project_manager.get_files():
-            if f['path'] == path:
-                return {
-                    'content': f['content'],
-                    'rel_path': f['rel_path']
-                }
-        return None
+        f = self.project_manager.get_file_by_path(path)
+        if f is None:
+            return None
+        return {
+            'content': self.project_manager.get_file_content(f),
+            'rel_path': f['rel_path']
+        }
 
     def save_content_to_codigo_txt(self, content, append=False):
         """Saves or appends content to ~/Documents/codigo.txt."""
@@ -403,11 +490,11 @@ class Controller:
         asset_type = asset['type']
         path = asset['path']
 
-        if asset_type == 'code':
-            # Read from cached files or disk
-            for f in self.project_manager.get_files():
-                if f['path'] == path:
-                    return f"--- Archivo: {f['rel_path']} ---\n{f['content']}"
+        if asset_type in ('code', 'grep'):
+            # Read from cached files or disk (a grep hit adds its whole file)
+            f = self.project_manager.get_file_by_path(path)
+            if f is not None:
+                return f"--- Archivo: {f['rel_path']} ---\n{self.project_manager.get_file_content(f)}"
             # Fallback: read from disk
             try:
                 with open(path, 'r', encoding='utf-8', errors='ignore') as fh:
@@ -448,12 +535,47 @@ class Controller:
 
         return ""
 
+    def grep_project(self, pattern, on_hits, max_hits=None, should_cancel=None):
+        """
+        Regex search over the content of the loaded files (metadata-only files are skipped).
+        Smart case: the pattern ignores case unless it contains an uppercase letter.
+        Hits are streamed to on_hits(list of (rel_path, path, line, column, preview)) from the
+        calling thread; see GrepEngine.search.
+
+        Returns:
+            (number of hits, True if the search stopped at max_hits)
+        """
+        if self.grep_engine is None:
+            self.grep_engine = GrepEngine(self.config_manager.get_grep_workers())
+        files = [(f['path'], f['rel_path']) for f in self.project_manager.get_files() if not f.get('skip')]
+        flags = 0 if any(c.isupper() for c in pattern) else re.IGNORECASE
+        return self.grep_engine.search(
+            pattern, files, on_hits, max_hits or self.config_manager.get_grep_max_hits(),
+            flags=flags, should_cancel=should_cancel
+        )
+
     def get_all_functions(self):
         """
         Returns all functions extracted from the project.
+        Parses the files that changed since the last call on the calling thread;
+        the UI checks functions_ready() first and uses prepare_functions() otherwise.
         """
         return self.project_manager.extract_functions()
 
+    def functions_ready(self):
+        """True if get_all_functions() returns without parsing."""
+        return self.project_manager.functions_ready()
+
+    def prepare_functions(self, on_ready=None):
+        """
+        Extracts the project's functions on a background thread.
+        on_ready(functions), if given, is called from that thread when they are ready.
+        """
+        self.symbol_worker.submit(
+            lambda should_cancel: self.project_manager.extract_functions(),
+            lambda generation, functions: on_ready(functions) if on_ready else None
+        )
+
     def copy_to_clipboard(self, text):
         """
         Copies the given text to the system clipboard.
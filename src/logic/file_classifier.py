@@ -0,0 +1,54 @@
+import os
+
+# Bytes inspected at the start of a file to decide whether it is worth indexing
+HEAD_BYTES = 8192
+
+# Files larger than this are kept as metadata only
+MAX_TEXT_BYTES = 1024 * 1024
+
+# A line this long in the head means the file is minified or generated
+MAX_LINE_LENGTH = 2000
+
+# Average line length in the head above which a file counts as minified
+MAX_AVG_LINE_LENGTH = 300
+
+# Generated files that match a code extension but are never useful as context
+GENERATED_NAMES = {'package-lock.json', 'npm-shrinkwrap.json', 'pnpm-lock.yaml'}
+GENERATED_SUFFIXES = ('.min.js', '.min.css', '.bundle.js', '.chunk.js', '.min.json')
+
+# Bytes that appear in text files (everything but NUL and most C0 control characters)
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)))
+
+
+def classify_by_metadata(filename, size):
+    """
+    Classifies a file without reading it.
+    Returns a skip reason ('generated' or 'oversized') or None if it has to be read.
+    """
+    name = os.path.basename(filename).lower()
+    if name in GENERATED_NAMES or name.endswith(GENERATED_SUFFIXES):
+        return 'generated'
+    if size > MAX_TEXT_BYTES:
+        return 'oversized'
+    return None
+
+
+def classify_head(head):
+    """
+    Classifies a file from its first bytes.
+    Returns a skip reason ('binary' or 'minified') or None for normal text.
+    """
+    if not head:
+        return None
+    if b'\x00' in head:
+        return 'binary'
+    # More than 10% control characters
+    if len(head.translate(None, _TEXT_BYTES)) * 10 > len(head):
+        return 'binary'
+
+    lines = head.split(b'\n')
+    if max(map(len, lines)) > MAX_LINE_LENGTH:
+        return 'minified'
+    if len(head) >= 1024 and len(head) / len(lines) > MAX_AVG_LINE_LENGTH:
+        return 'minified'
+    return None
@@ -0,0 +1,139 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from src.logic.content_store import read_file_bytes, decode_content
+from src.logic.search_worker import check_cancelled
+
+# Longest line preview sent back per hit
+PREVIEW_CHARS = 200
+
+# Characters with a meaning in a regex; a pattern without any is a plain literal
+REGEX_METACHARS = frozenset('.^$*+?{}[]()|\\')
+
+# Patterns compiled in this (worker) process: {(pattern, flags): compiled}
+_compiled = {}
+
+
+def _get_pattern(pattern, flags):
+    compiled = _compiled.get((pattern, flags))
+    if compiled is None:
+        compiled = _compiled[(pattern, flags)] = re.compile(pattern, flags)
+    return compiled
+
+
+def grep_chunk(pattern, flags, files, max_hits):
+    """
+    Greps a chunk of (path, rel_path) files; runs in a worker process.
+    The pattern is compiled once per process. Returns up to max_hits hits
+    as (rel_path, path, line, column, preview), lines and columns 1-based.
+
+    Literal patterns are first searched in the whole file, which rules out
+    most files with a single scan. Other regexes go straight to the per-line
+    pass: on the whole text, anchors (\\A, \\Z) and lookarounds see the
+    neighbouring lines and could wrongly rule a file out.
+    """
+    regex = _get_pattern(pattern, flags)
+    literal = REGEX_METACHARS.isdisjoint(pattern)
+    hits = []
+    for path, rel_path in files:
+        data = read_file_bytes(path)
+        if not data:
+            continue
+        content = decode_content(data)
+        if literal and regex.search(content) is None:
+            continue # No line splitting for the files that do not match
+        for line_no, line in enumerate(content.split('\n'), 1):
+            match = regex.search(line)
+            if match is None:
+                continue
+            hits.append((rel_path, path, line_no, match.start() + 1, line.strip()[:PREVIEW_CHARS]))
+            if len(hits) >= max_hits:
+                return hits
+    return hits
+
+
+class GrepEngine:
+    """
+    Regex search over the content of project files, in a pool of worker processes.
+
+    The pattern is validated once here and compiled once per worker. Files
+    are sent in chunks of chunk_size with a bounded number of chunks in
+    flight, so hits are streamed to on_hits(hits) as chunks complete and the
+    search stops submitting work once max_hits hits were delivered (or it is
+    cancelled). Matching is line based; hits arrive in completion order.
+    If worker processes cannot be started, chunks run in the calling thread.
+    """
+
+    def __init__(self, workers=None, chunk_size=64):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            try:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            except (OSError, NotImplementedError, ImportError) as e:
+                print(f"GrepEngine: Process pool unavailable ({e}), searching in-thread")
+                return None
+        return self._pool
+
+    def search(self, pattern, files, on_hits, max_hits=500, flags=0, should_cancel=None):
+        """
+        Greps files (list of (path, rel_path)) for pattern.
+        on_hits(list of (rel_path, path, line, column, preview)) is called from this thread.
+        Raises re.error for an invalid pattern and SearchCancelled if should_cancel says so.
+
+        Returns:
+            (number of hits delivered, True if the search stopped at max_hits)
+        """
+        re.compile(pattern, flags) # Fail fast, before any work is sent
+        chunks = [files[i:i + self.chunk_size] for i in range(0, len(files), self.chunk_size)]
+        pool = self._get_pool()
+        if pool is None:
+            return self._search_in_thread(pattern, flags, chunks, on_hits, max_hits, should_cancel)
+
+        delivered = 0
+        pending = set()
+        next_chunk = 0
+        try:
+            while next_chunk < len(chunks) or pending:
+                check_cancelled(should_cancel)
+                while next_chunk < len(chunks) and len(pending) < self.workers * 2:
+                    pending.add(pool.submit(grep_chunk, pattern, flags, chunks[next_chunk], max_hits - delivered))
+                    next_chunk += 1
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        hits = future.result()[:max_hits - delivered]
+                    except BrokenProcessPool:
+                        self._pool = None # A worker died; start a new pool next time
+                        raise
+                    if hits:
+                        check_cancelled(should_cancel)
+                        delivered += len(hits)
+                        on_hits(hits)
+                    if delivered >= max_hits:
+                        return delivered, True
+        finally:
+            for future in pending:
+                future.cancel()
+        return delivered, False
+
+    def _search_in_thread(self, pattern, flags, chunks, on_hits, max_hits, should_cancel):
+        delivered = 0
+        for chunk in chunks:
+            check_cancelled(should_cancel)
+            hits = grep_chunk(pattern, flags, chunk, max_hits - delivered)
+            if hits:
+                delivered += len(hits)
+                on_hits(hits)
+            if delivered >= max_hits:
+                return delivered, True
+        return delivered, False
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,142 @@
+import os
+import re
+
+
+def _translate(pattern):
+    """Translates a gitignore glob (without anchoring) into a regex body."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreMatcher:
+    """
+    Compiled .gitignore / exclude-pattern matcher shared by every project scan.
+
+    Understands the usual gitignore syntax: comments, '!' negation, trailing
+    '/' for directory-only rules, anchored patterns (containing '/'), '*', '?',
+    character classes and '**'. Rules from nested .gitignore files are scoped
+    to their directory. Paths are relative to the project root.
+    """
+
+    def __init__(self):
+        self._rules = [] # [(compiled regex, negate, dir_only)]
+        self._has_negation = False
+        self._combined = None # (any_regex, dir_only_regex), built lazily when there are no negations
+
+    @classmethod
+    def for_project(cls, root, extra_patterns=()):
+        """Builds a matcher from the project's .gitignore, .git/info/exclude and extra patterns."""
+        matcher = cls()
+        matcher.add_patterns(extra_patterns)
+        for rules_file in (os.path.join(root, '.git', 'info', 'exclude'), os.path.join(root, '.gitignore')):
+            matcher.add_file(rules_file)
+        return matcher
+
+    def add_file(self, rules_file, base=""):
+        """Adds the rules of an ignore file. base is the directory (relative path) the file lives in."""
+        try:
+            with open(rules_file, 'r', encoding='utf-8', errors='ignore') as f:
+                self.add_patterns(f.read().splitlines(), base)
+        except OSError:
+            pass
+
+    def add_patterns(self, lines, base=""):
+        """Adds gitignore-style patterns, scoped to the base directory."""
+        prefix = re.escape(base.replace(os.sep, '/') + '/') if base else ''
+        for line in lines:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            # Trailing spaces are ignored unless escaped
+            if not line.endswith('\\ '):
+                line = line.rstrip()
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            body = _translate(line)
+            regex = '^' + prefix + ('' if anchored else '(?:.*/)?') + body + '$'
+            try:
+                compiled = re.compile(regex)
+            except re.error:
+                continue
+            self._rules.append((compiled, negate, dir_only))
+            self._has_negation = self._has_negation or negate
+        self._combined = None
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """True if the entry at rel_path (file or directory) is ignored. Does not check parents."""
+        if not self._rules:
+            return False
+        if os.sep != '/':
+            rel_path = rel_path.replace(os.sep, '/')
+
+        if not self._has_negation:
+            if self._combined is None:
+                any_rules = [r.pattern for r, _, d in self._rules if not d]
+                dir_rules = [r.pattern for r, _, d in self._rules if d]
+                self._combined = (
+                    re.compile('|'.join(f'(?:{p})' for p in any_rules)) if any_rules else None,
+                    re.compile('|'.join(f'(?:{p})' for p in dir_rules)) if dir_rules else None,
+                )
+            any_re, dir_re = self._combined
+            if any_re and any_re.match(rel_path):
+                return True
+            return bool(is_dir and dir_re and dir_re.match(rel_path))
+
+        # Last matching rule wins
+        for regex, negate, dir_only in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        return False
+
+    def is_path_ignored(self, rel_path):
+        """True if a file or any of its parent directories is ignored."""
+        parts = rel_path.replace(os.sep, '/').split('/')
+        for i in range(1, len(parts)):
+            if self.is_ignored('/'.join(parts[:i]), is_dir=True):
+                return True
+        return self.is_ignored('/'.join(parts), is_dir=False)
@@ -0,0 +1,132 @@
+import re
+from bisect import bisect_left, bisect_right
+
+# Tokens that matter for structure in code: comments, strings, template starts, brackets and '/'
+CODE_RE = re.compile(
+    r"//[^\n]*"
+    r"|/\*[\s\S]*?(?:\*/|\Z)"
+    r"|'(?:\\[\s\S]|[^'\\\n])*'?"
+    r'|"(?:\\[\s\S]|[^"\\\n])*"?'
+    r"|[`{}()/]"
+)
+# Rest of a template literal chunk: up to the closing backtick or a '${'
+TEMPLATE_RE = re.compile(r"(?:\\[\s\S]|[^`\\$]|\$(?!\{))*(`|\$\{)?")
+# Body and flags of a regex literal (after its opening '/')
+REGEX_LITERAL_RE = re.compile(r"(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-zA-Z]*")
+
+# After these characters or keywords a '/' starts a regex literal instead of a division
+REGEX_PRECEDING_CHARS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_PRECEDING_WORDS = {
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'instanceof', 'yield', 'await'
+}
+
+# Marker on the brace stack for the '${' of a template literal
+_TEMPLATE = -1
+
+
+class JsStructure:
+    """
+    Bracket structure of a JS/TS source: matching braces and parentheses in
+    code, and the spans that are not code (comments, strings, template
+    literal text, regex literals).
+    """
+    __slots__ = ('braces', 'parens', 'open_braces', '_span_starts', '_span_ends')
+
+    def __init__(self, braces, parens, open_braces, spans):
+        self.braces = braces # {position of '{': position of its '}'}
+        self.parens = parens # {position of '(': position of its ')'}
+        self.open_braces = open_braces # Ascending positions of the '{' in code
+        self._span_starts = [start for start, _ in spans]
+        self._span_ends = [end for _, end in spans]
+
+    def is_code(self, pos):
+        """False if pos is inside a comment, string, template text or regex literal."""
+        i = bisect_right(self._span_starts, pos) - 1
+        return i < 0 or pos >= self._span_ends[i]
+
+    def brace_after(self, pos):
+        """Position of the first '{' in code at or after pos, or -1."""
+        i = bisect_left(self.open_braces, pos)
+        return self.open_braces[i] if i < len(self.open_braces) else -1
+
+
+def _starts_regex(content, pos):
+    """Whether the '/' at pos starts a regex literal, judging by what precedes it."""
+    i = pos - 1
+    while i >= 0 and content[i] in ' \t\r\n':
+        i -= 1
+    if i < 0 or content[i] in REGEX_PRECEDING_CHARS:
+        return True
+    if content[i].isalnum() or content[i] in '_$':
+        end = i + 1
+        while i >= 0 and (content[i].isalnum() or content[i] in '_$'):
+            i -= 1
+        return content[i + 1:end] in REGEX_PRECEDING_WORDS
+    return False
+
+
+def scan_js(content):
+    """
+    Scans a JS/TS source once, jumping between the tokens that matter, and
+    returns its JsStructure. Unterminated strings end at the line end and
+    unclosed brackets are left unmatched.
+    """
+    braces = {}
+    parens = {}
+    open_braces = []
+    spans = []
+    brace_stack = [] # Positions of open '{', or _TEMPLATE for a '${'
+    paren_stack = []
+    pos = 0
+    length = len(content)
+    in_template = False
+
+    while pos < length:
+        if in_template:
+            match = TEMPLATE_RE.match(content, pos)
+            end = match.end()
+            spans.append((pos, end))
+            pos = end
+            if match.group(1) == '${':
+                brace_stack.append(_TEMPLATE)
+                in_template = False
+            elif match.group(1) is None:
+                break # Unterminated template literal
+            else:
+                in_template = False
+            continue
+
+        match = CODE_RE.search(content, pos)
+        if match is None:
+            break
+        start, end = match.span()
+        token = match.group()
+        if token == '{':
+            brace_stack.append(start)
+            open_braces.append(start)
+        elif token == '}':
+            if brace_stack:
+                opened = brace_stack.pop()
+                if opened == _TEMPLATE:
+                    in_template = True # Back to the text of the template literal
+                else:
+                    braces[opened] = start
+        elif token == '(':
+            paren_stack.append(start)
+        elif token == ')':
+            if paren_stack:
+                parens[paren_stack.pop()] = start
+        elif token == '`':
+            in_template = True
+        elif token == '/':
+            if _starts_regex(content, start):
+                literal = REGEX_LITERAL_RE.match(content, end)
+                if literal:
+                    end = literal.end()
+                    spans.append((start, end))
+        else:
+            spans.append((start, end)) # Comment or string
+        pos = end
+
+    return JsStructure(braces, parens, open_braces, spans)
@@ -1,5 +1,42 @@
 import os
 import re
+import ast
+import time
+import heapq
+import fnmatch
+import warnings
+import threading
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from src.logic.content_store import ContentStore, read_file_bytes, decode_content
+from src.logic.scan_cache import ScanCache
+from src.logic.project_walker import walk_project, render_tree, is_ignored_dir, VISIBLE_DOTFILES
+from src.logic.file_classifier import classify_by_metadata, classify_head, HEAD_BYTES
+from src.logic.project_residency import ResidentProjectCache
+from src.logic.records import FileRecord, SymbolRecord
+from src.logic.search_index import SearchIndex, IndexImage, tokenize, TOKEN_RE, min_span, has_phrase
+from src.logic.symbol_index import extract_class_names, SymbolTable
+from src.logic.ranking import get_ranker, IncrementalScorer, DEFAULT_RANKER
+from src.logic.search_worker import check_cancelled
+from src.logic.query_parser import parse_query, TERM, PHRASE, PATH, REGEX
+from src.logic.js_scanner import scan_js
+
+# Definitions in JS/TS lines: function keyword, arrow function assigned to a name, method
+JS_FN_KEYWORD_RE = re.compile(r'(?:export\s+)?(?:async\s+)?function\s+([a-zA-Z_]\w*)\s*\(')
+JS_ARROW_FN_RE = re.compile(
+    r'(?:export\s+)?(?:const|let|var)\s+([a-zA-Z_]\w*)\s*=\s*(?:async\s+)?(?:\([^)]*\)|[a-zA-Z_]\w*)\s*=>'
+)
+JS_METHOD_RE = re.compile(r'^[ \t]*([a-zA-Z_]\w*)\s*\([^)]*\)\s*\{')
+# Statements that look like methods to JS_METHOD_RE ('if (x) {')
+JS_CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'with', 'function'}
+
+# Project files are parsed under this name; their syntax warnings (e.g. invalid escapes) are not ours to show
+PARSE_FILENAME = '<project-file>'
+for _category in (SyntaxWarning, DeprecationWarning):
+    warnings.filterwarnings('ignore', category=_category, module=PARSE_FILENAME)
+
 
 class ProjectManager:
     """
@@ -13,10 +50,53 @@ class ProjectManager:
         '.rb', '.swift', '.kt', '.sql', '.json', '.xml', '.yml', '.yaml'
     }
 
+    # Default size of the ingestion thread pool when no config is available
+    DEFAULT_SCAN_WORKERS = 8
+    # Files each scan worker may read ahead of decoding (bounds the raw bytes held at once)
+    READ_AHEAD_PER_WORKER = 4
+
+    # Default byte budget of the content cache when no config is available
+    DEFAULT_CONTENT_CACHE_MB = 64
+
+    # Extensions whose functions extract_functions returns
+    SYMBOL_EXTENSIONS = {'.py', '.js', '.jsx', '.ts', '.tsx'}
+
+    # Number of best candidates re-ranked by the phrase/proximity stage
+    PROXIMITY_CANDIDATES = 50
+    # Average characters per word (with its separator), to measure proximity windows in words
+    PROXIMITY_WORD_CHARS = 6
+
+    # Rough per-file memory cost of metadata, path indexes and scan entries (for residency accounting)
+    FILE_OVERHEAD_BYTES = 1024
+
+    # Attributes that make up the loaded state of one project (swapped as a unit by the resident cache)
+    STATE_ATTRS = (
+        'current_project_path', 'files', '_by_path', '_by_rel_path', 'content_store',
+        'scan_cache', '_scan_entries', 'scan_stats', '_walk_cache', 'search_index', 'symbol_table'
+    )
+
     def __init__(self, config_manager=None):
         self.config_manager = config_manager
         self.current_project_path = None
-        self.files = [] # List of dicts: {'path': absolute_path, 'rel_path': relative_path, 'content': str}
+        # List of FileRecords (dict-style access: 'path', 'rel_path', 'size', 'mtime' in ns,
+        # 'skip': reason for metadata-only files (binary, minified, oversized, generated) or None)
+        self.files = []
+        self._by_path = {} # {abs_path: FileRecord}, kept in sync with files
+        self._by_rel_path = {} # {rel_path: FileRecord}, kept in sync with files
+        self.content_store = ContentStore(self._get_content_cache_bytes())
+        self.search_index = SearchIndex(self.content_store.get) # Token postings of files and paths
+        self.symbol_table = SymbolTable(self.content_store) # Extracted functions, by content hash
+        self.scan_cache = None
+        self._scan_entries = {} # {rel_path: {'size', 'mtime', 'hash', 'derived'}} (see ScanCache)
+        # Last load: seconds per phase ('cache', 'walk', 'read', 'decode', 'derive', 'save', 'index') and
+        # counts ('workers', 'files', 'reused', 'skipped'); see _scan_directory
+        self.scan_stats = {}
+        self.generation = 0 # Bumped whenever the set of files or their content changes
+        self._walk_cache = None # (generation, WalkResult) shared by the scan, the tree and non-code listing
+        self._lock = threading.RLock()
+        self.resident_projects = ResidentProjectCache(*self._get_residency_limits())
+        self._ranker = None
+        self._scorer = IncrementalScorer() # Per-token partial scores reused while the user types
 
     def load_project(self, path):
         """
@@ -26,136 +106,762 @@ class ProjectManager:
         if not os.path.isdir(path):
             raise ValueError(f"Invalid directory path: {path}")
 
-        self.current_project_path = path
-        self.files = []
-        
-        self._scan_directory(path)
-        print(f"ProjectManager: Loaded {len(self.files)} files from {path}")
+        with self._lock:
+            # Take the target first so parking the current project cannot evict it
+            state = self.resident_projects.take(path)
+            if self.current_project_path and self.current_project_path != path:
+                self._park_current_project()
+            if state is not None:
+                self._adopt_state(state)
+                self.generation += 1
+                print(f"ProjectManager: Resumed {path} from memory ({len(self.files)} files)")
+                if not self._is_watched():
+                    # Nothing kept the parked state up to date: catch up with the disk
+                    self.sync_with_disk()
+                return
+
+            if self.scan_cache:
+                self.scan_cache.flush() # A pending save must not land after this scan reads the cache
+            self.current_project_path = path
+            self.files = []
+            self.content_store = ContentStore(self._get_content_cache_bytes())
+            self.search_index = SearchIndex(self.content_store.get)
+            self.symbol_table = SymbolTable(self.content_store)
+            self.scan_cache = ScanCache(path)
+            
+            image, changed = self._scan_directory(path)
+            t_index = time.perf_counter()
+            self._by_path = {f['path']: f for f in self.files}
+            self._by_rel_path = {f['rel_path']: f for f in self.files}
+            self._build_index(image)
+            t_save = time.perf_counter()
+            if changed:
+                self.scan_cache.save(*self._scan_cache_snapshot())
+            self.scan_stats['index'] = t_save - t_index
+            self.scan_stats['save'] = time.perf_counter() - t_save
+            self.generation += 1
+        stats = self.scan_stats
+        print(
+            f"ProjectManager: Loaded {len(self.files)} files from {path} "
+            f"({stats['reused']} unchanged since last scan, {stats['skipped']} metadata-only; "
+            f"cache {stats['cache']:.3f}s, walk {stats['walk']:.3f}s, read {stats['read']:.3f}s, "
+            f"decode {stats['decode']:.3f}s, derive {stats['derive']:.3f}s, index {stats['index']:.3f}s, "
+            f"save {stats['save']:.3f}s, {stats['workers']} workers)"
+        )
+
+    def _get_residency_limits(self):
+        """Returns (max parked projects, memory cap in bytes) for the resident project cache."""
+        if self.config_manager:
+            return (
+                int(self.config_manager.get_resident_projects()),
+                int(self.config_manager.get_resident_memory_mb() * 1024 * 1024)
+            )
+        return 2, 256 * 1024 * 1024
+
+    def export_state(self):
+        """Returns the loaded state of the current project (see STATE_ATTRS)."""
+        with self._lock:
+            return {name: getattr(self, name) for name in self.STATE_ATTRS}
+
+    def _adopt_state(self, state):
+        """Makes a previously exported project state the current one."""
+        for name in self.STATE_ATTRS:
+            setattr(self, name, state[name])
+        if self._walk_cache:
+            # Re-tag the walk with the generation this project is about to get
+            self._walk_cache = (self.generation + 1, self._walk_cache[1])
+
+    def _park_current_project(self):
+        """Moves the current project's state into the resident cache."""
+        self.resident_projects.park(self.current_project_path, self.export_state(), self.estimate_memory())
+
+    def estimate_memory(self):
+        """Rough estimate (bytes) of the memory held by the current project's state."""
+        return (
+            self.content_store.used_bytes + self.search_index.estimate_bytes()
+            + len(self.files) * self.FILE_OVERHEAD_BYTES
+        )
+
+    def prewarm_projects(self, paths):
+        """Loads the given projects in the background so switching to them is a swap."""
+        paths = [p for p in paths if p != self.current_project_path and os.path.isdir(p)]
+        if paths:
+            self.resident_projects.prewarm(
+                paths, self._load_detached_state, skip=lambda p: p == self.current_project_path
+            )
+
+    def _load_detached_state(self, path):
+        """Loads a project into a separate manager (background thread) and returns its state."""
+        loader = ProjectManager(self.config_manager)
+        loader.load_project(path)
+        return loader.export_state(), loader.estimate_memory()
+
+    def _get_scan_workers(self):
+        """Returns the size of the ingestion thread pool (1 = sequential)."""
+        if self.config_manager:
+            return max(1, int(self.config_manager.get_scan_workers()))
+        return self.DEFAULT_SCAN_WORKERS
+
+    def _get_content_cache_bytes(self):
+        """Returns the byte budget of the content cache."""
+        if self.config_manager:
+            return int(self.config_manager.get_content_cache_mb() * 1024 * 1024)
+        return self.DEFAULT_CONTENT_CACHE_MB * 1024 * 1024
 
     def _scan_directory(self, path):
         """
         Recursively scans the directory for code files.
+        
+        Loads the persistent scan cache, walks the project (collecting candidate
+        paths and their metadata), then reads the files that changed on a
+        bounded thread pool while the calling thread decodes them and derives
+        their scan entries in walk order. Each phase is timed separately in
+        scan_stats: 'read' is the time spent waiting for reads, 'decode' covers
+        classification and decoding, 'derive' hashing, tokenizing and symbol
+        extraction ('index' and 'save' are added by load_project).
+        Files whose size and mtime match the persistent scan cache are not read
+        at all, provided the saved search index image has their postings; their
+        content is loaded lazily by the content store on first access.
+        Binary, minified, oversized and generated files are kept as metadata only
+        unless they match the project's scan overrides.
+
+        Returns (IndexImage or None, True if the scan cache needs saving).
         """
-        for root, _, filenames in os.walk(path):
-            # Skip common junk directories
-            if any(part.startswith('.') or part in ('__pycache__', 'node_modules', 'venv', 'env') for part in root.split(os.sep)):
+        t_start = time.perf_counter()
+        cached_entries = self.scan_cache.load() if self.scan_cache else {}
+        image = None
+        if cached_entries:
+            data = self.scan_cache.load_index()
+            image = IndexImage.from_bytes(data) if data else None
+        indexed = set(image.paths) if image else set()
+        t_cache = time.perf_counter()
+        self._scan_entries = {}
+        overrides = self._get_scan_overrides()
+        stale = []
+        reused = 0
+
+        # 1. Walk
+        walk = walk_project(path, self.CODE_EXTENSIONS, self._get_exclude_patterns())
+        for full_path, rel_path, size, mtime in walk.code_files:
+            file_data = FileRecord(full_path, rel_path, size, mtime)
+            self.files.append(file_data)
+            overridden = self._is_scan_override(rel_path, overrides)
+            entry = cached_entries.get(rel_path)
+            if (ScanCache.is_fresh(entry, size, mtime) and entry.get('override', False) == overridden
+                    and (entry.get('skip') or rel_path in indexed)):
+                self._scan_entries[rel_path] = entry
+                if entry.get('skip'):
+                    file_data['skip'] = entry['skip']
+                reused += 1
                 continue
-                
-            for filename in filenames:
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in self.CODE_EXTENSIONS:
-                    full_path = os.path.join(root, filename)
-                    try:
-                        # Attempt to read file content to cache it (or at least verify it's text)
-                        # For large projects, we might want to lazy load, but requirement says "read content" for prompt gen
-                        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                        self.files.append({
-                            'path': full_path,
-                            'rel_path': os.path.relpath(full_path, self.current_project_path),
-                            'content': content
-                        })
-                    except Exception as e:
-                        print(f"Error reading file {full_path}: {e}")
+            reason = None if overridden else classify_by_metadata(full_path, size)
+            if reason:
+                self._scan_entries[rel_path] = self._build_scan_entry(file_data, None, None, skip=reason)
+            else:
+                stale.append((file_data, overridden))
+        t_walk = time.perf_counter()
+
+        # 2. Read (I/O bound, releases the GIL) overlapped with 3. decode and derive
+        timings = {'read': 0.0, 'decode': 0.0, 'derive': 0.0}
+        workers = self._get_scan_workers()
+        raw_contents = self._read_files([f['path'] for f, _ in stale], workers, timings)
+        for (file_data, overridden), data in zip(stale, raw_contents):
+            if data is not None:
+                self._ingest_file_data(file_data, data, overridden, timings)
+
+        self._walk_cache = (self.generation + 1, walk)
+        self.scan_stats = {
+            'cache': t_cache - t_start,
+            'walk': t_walk - t_cache,
+            **timings,
+            'workers': workers,
+            'files': len(self.files),
+            'reused': reused,
+            'skipped': sum(1 for f in self.files if f.get('skip')),
+        }
+        changed = reused != len(self._scan_entries) or len(cached_entries) != len(self._scan_entries)
+        return image, changed
+
+    def _get_scan_overrides(self):
+        """Glob patterns (relative paths or file names) that are always fully ingested in this project."""
+        if self.config_manager and self.current_project_path:
+            return self.config_manager.get_scan_overrides(self.current_project_path)
+        return []
+
+    @staticmethod
+    def _is_scan_override(rel_path, overrides):
+        if not overrides:
+            return False
+        posix_path = rel_path.replace(os.sep, '/')
+        name = os.path.basename(rel_path)
+        return any(fnmatch.fnmatch(posix_path, pat) or fnmatch.fnmatch(name, pat) for pat in overrides)
+
+    def _read_files(self, paths, workers, timings):
+        """
+        Yields the raw bytes of paths in order (None if unreadable), read on a pool of
+        workers threads at most READ_AHEAD_PER_WORKER files per worker ahead of the
+        consumer. The time spent waiting for reads is added to timings['read'].
+        """
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                t_start = time.perf_counter()
+                data = read_file_bytes(path)
+                timings['read'] += time.perf_counter() - t_start
+                yield data
+            return
+        remaining = iter(paths)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+            pending = deque(
+                pool.submit(read_file_bytes, p) for p in islice(remaining, workers * self.READ_AHEAD_PER_WORKER)
+            )
+            while pending:
+                t_start = time.perf_counter()
+                data = pending.popleft().result()
+                timings['read'] += time.perf_counter() - t_start
+                for path in islice(remaining, 1):
+                    pending.append(pool.submit(read_file_bytes, path))
+                yield data
+
+    def _ingest_file_data(self, file_data, data, overridden, timings=None):
+        """
+        Classifies freshly read bytes, records the scan entry and caches the content of text files.
+        timings, if given, accumulates the 'decode' and 'derive' seconds (see _scan_directory).
+        """
+        t_start = time.perf_counter()
+        reason = None if overridden else classify_head(data[:HEAD_BYTES])
+        content = None if reason else decode_content(data)
+        t_decoded = time.perf_counter()
+        self._scan_entries[file_data['rel_path']] = self._build_scan_entry(
+            file_data, data, content, skip=reason, override=overridden
+        )
+        if content is not None:
+            self.content_store.put(file_data['path'], content)
+        if timings is not None:
+            timings['decode'] += t_decoded - t_start
+            timings['derive'] += time.perf_counter() - t_decoded
+
+    def flush_scan_cache(self):
+        """Writes a pending scan cache save of the loaded project now (e.g. on exit)."""
+        if self.scan_cache:
+            self.scan_cache.flush()
+
+    def _is_watched(self):
+        """True if a ProjectWatcher keeps the loaded project in sync (see Controller)."""
+        return bool(self.config_manager) and self.config_manager.get_watch_project()
+
+    def diff_with_disk(self):
+        """
+        Compares the loaded files with a fresh walk of the project.
+        Returns (added, modified, deleted, walk_result); paths are absolute.
+        """
+        known = {f['path']: (f['size'], f['mtime']) for f in self.files}
+        walk = self.walk_project()
+        current = {p: (size, mtime) for p, _, size, mtime in walk.code_files}
+        added = [p for p in current if p not in known]
+        deleted = [p for p in known if p not in current]
+        modified = [p for p, sig in current.items() if p in known and known[p] != sig]
+        return added, modified, deleted, walk
+
+    def sync_with_disk(self):
+        """Applies the changes made on disk since the files were last read. Returns the apply_changes summary."""
+        added, modified, deleted, walk = self.diff_with_disk()
+        return self.apply_changes(added=added, modified=modified, deleted=deleted, walk_result=walk)
+
+    def walk_project(self):
+        """Walks the loaded project from scratch (no caching). Returns a WalkResult."""
+        return walk_project(self.current_project_path, self.CODE_EXTENSIONS, self._get_exclude_patterns())
+
+    def _get_exclude_patterns(self):
+        """Extra gitignore-style patterns from config, applied on top of the project's .gitignore."""
+        if self.config_manager:
+            return self.config_manager.get_exclude_patterns()
+        return []
+
+    def get_walk_result(self):
+        """
+        Returns the WalkResult of the loaded project, walking again only if the
+        project generation changed since the last walk.
+        """
+        if not self.current_project_path:
+            return None
+        with self._lock:
+            cached = self._walk_cache
+            if cached and cached[0] == self.generation:
+                return cached[1]
+            walk = self.walk_project()
+            self._walk_cache = (self.generation, walk)
+            return walk
+
+    def invalidate_walk(self):
+        """Marks the cached walk as stale (e.g. a non-code file or directory changed)."""
+        with self._lock:
+            self._walk_cache = None
+
+    def is_code_file(self, full_path):
+        """True if full_path is a file the scan would pick up (right extension, not in a skipped directory)."""
+        if os.path.splitext(full_path)[1].lower() not in self.CODE_EXTENSIONS:
+            return False
+        return not self.is_path_ignored(full_path)
+
+    def is_path_ignored(self, full_path, is_dir=False):
+        """
+        True if no project walk would see full_path: outside the project, inside
+        an ignored directory (node_modules, .git, build...), a hidden file, or
+        excluded by the .gitignore rules of the cached walk.
+        """
+        if not self.current_project_path:
+            return True
+        rel = os.path.relpath(full_path, self.current_project_path)
+        if rel.startswith(os.pardir):
+            return True
+        if rel == os.curdir:
+            return False
+        parts = rel.split(os.sep)
+        dir_parts = parts if is_dir else parts[:-1]
+        if any(is_ignored_dir(part) for part in dir_parts):
+            return True
+        if not is_dir and parts[-1].startswith('.') and parts[-1] not in VISIBLE_DOTFILES:
+            return True
+        walk = self._walk_cache[1] if self._walk_cache else None
+        if not walk or not walk.matcher:
+            return False
+        if is_dir:
+            return any(walk.matcher.is_ignored(os.sep.join(parts[:i]), is_dir=True) for i in range(1, len(parts) + 1))
+        return walk.matcher.is_path_ignored(rel)
+
+    def apply_changes(self, added=(), modified=(), deleted=(), walk_result=None, root_path=None):
+        """
+        Applies filesystem deltas (absolute paths) to the loaded project without a full rescan.
+        Added and modified files are re-read; deleted ones are dropped from files,
+        the content store and the scan cache. A fresh walk_result, if the caller
+        already has one, replaces the cached walk instead of walking again.
+        If root_path is given and another project is loaded by now, nothing is applied.
+        
+        Returns:
+            Dict {'added': [rel_path], 'modified': [rel_path], 'deleted': [rel_path]} of what actually changed.
+        """
+        summary = {'added': [], 'modified': [], 'deleted': []}
+        with self._lock:
+            if not self.current_project_path:
+                return summary
+            if root_path is not None and root_path != self.current_project_path:
+                return summary # Computed for a project that was switched away from
+            overrides = self._get_scan_overrides()
+            by_path = dict(self._by_path)
+
+            deleted = {p for p in deleted if p in by_path}
+            for p in deleted:
+                file_data = by_path.pop(p)
+                self._scan_entries.pop(file_data['rel_path'], None)
+                self.content_store.discard(p)
+                self.search_index.remove(p)
+                summary['deleted'].append(file_data['rel_path'])
+
+            new_files = []
+            for p in list(modified) + list(added):
+                file_data = by_path.get(p)
+                if file_data is None and (p in deleted or not self.is_code_file(p)):
+                    continue
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                if file_data is not None and file_data['size'] == st.st_size and file_data['mtime'] == st.st_mtime_ns:
+                    continue # Already up to date (e.g. written by replace_region)
+                rel_path = os.path.relpath(p, self.current_project_path)
+                overridden = self._is_scan_override(rel_path, overrides)
+                reason = None if overridden else classify_by_metadata(p, st.st_size)
+                data = None
+                if not reason:
+                    data = read_file_bytes(p)
+                    if data is None:
+                        continue
+                if file_data is None:
+                    file_data = FileRecord(p, rel_path, st.st_size, st.st_mtime_ns)
+                    by_path[p] = file_data
+                    new_files.append(file_data)
+                    summary['added'].append(file_data['rel_path'])
+                else:
+                    file_data['size'] = st.st_size
+                    file_data['mtime'] = st.st_mtime_ns
+                    summary['modified'].append(file_data['rel_path'])
+                self.content_store.discard(p)
+                if reason:
+                    self._scan_entries[rel_path] = self._build_scan_entry(file_data, None, None, skip=reason)
+                else:
+                    self._ingest_file_data(file_data, data, overridden)
+                self._index_file(file_data)
+
+            if not any(summary.values()):
+                if walk_result is not None and self._walk_cache:
+                    if walk_result.structure_key() != self._walk_cache[1].structure_key():
+                        # Only non-code files or directories changed
+                        self.generation += 1
+                        self._walk_cache = (self.generation, walk_result)
+                return summary
+
+            # Copy-on-write so searches iterating the old list/indexes on other threads are unaffected
+            self.files = [f for f in self.files if f['path'] not in deleted] + new_files
+            by_rel_path = dict(self._by_rel_path)
+            for rel_path in summary['deleted']:
+                by_rel_path.pop(rel_path, None)
+            for f in new_files:
+                by_rel_path[f['rel_path']] = f
+            self._by_path = by_path
+            self._by_rel_path = by_rel_path
+            self.generation += 1
+            if walk_result is not None:
+                self._walk_cache = (self.generation, walk_result)
+            self._schedule_cache_save()
+
+        print(
+            f"ProjectManager: Applied changes "
+            f"(+{len(summary['added'])} ~{len(summary['modified'])} -{len(summary['deleted'])})"
+        )
+        return summary
+
+    def _build_scan_entry(self, file_data, data, content, skip=None, override=False):
+        """
+        Builds the scan cache entry of a freshly read file and flags file_data
+        as metadata-only if skip is given (data may be None if it was never read).
+        """
+        entry = {
+            'size': file_data['size'],
+            'mtime': file_data['mtime'],
+            'hash': ScanCache.hash_bytes(data) if data is not None else None,
+            'derived': self._derive_file_data(content, file_data) if content is not None else {}
+        }
+        if skip:
+            entry['skip'] = skip
+        file_data['skip'] = skip
+        if override:
+            entry['override'] = True
+        return entry
+
+    def _derive_file_data(self, content, file_data):
+        """
+        Computes the per-file data that is worth persisting between sessions.
+        Must only depend on the file content and its extension.
+        """
+        derived = {
+            'lines': content.count('\n') + 1 if content else 0,
+            'tokens': tokenize(content.lower())
+        }
+        symbols = self._extract_symbol_names(file_data, content)
+        if symbols:
+            derived['symbols'] = symbols
+        return derived
+
+    def _extract_symbol_names(self, file_data, content):
+        """
+        Names of the functions, methods and classes defined in a .py or JS/TS file (for the search index).
+        Python uses the line regex: it runs for every file read by a scan, where a full parse costs too much.
+        """
+        ext = os.path.splitext(file_data['path'])[1].lower()
+        if ext != '.py' and ext not in ('.js', '.jsx', '.ts', '.tsx'):
+            return []
+        lines = content.split('\n')
+        if ext == '.py':
+            functions = self._extract_python_functions_regex(file_data, lines)
+        else:
+            functions = self._extract_js_functions(file_data, content, lines)
+        names = [fn.name for fn in functions] + extract_class_names(content, ext)
+        return list(dict.fromkeys(names))
+
+    def _build_index(self, image):
+        """
+        Indexes the loaded files: restores the postings of the scan cache's index
+        image, then indexes the freshly read files on top (those the image had
+        keep their doc id, so results keep breaking ties in the same order).
+        """
+        if image is not None:
+            records = {}
+            for f in self.files:
+                entry = self._scan_entries.get(f['rel_path'])
+                if entry is not None and not f.get('skip'):
+                    records[f['rel_path']] = (f, entry['derived'].get('symbols', ()))
+            self.search_index.restore(image, records)
+        for f in self.files:
+            entry = self._scan_entries.get(f['rel_path'])
+            if image is None or entry is None or 'tokens' in entry['derived']:
+                self._index_file(f)
+
+    def _index_file(self, file_data):
+        """
+        Brings the search index entry of a file in line with its (fresh) scan entry.
+        Files that could not be read are indexed by path only. The token counts
+        are dropped from the entry once indexed: the index holds them, and is
+        saved with the scan cache as a whole (see _scan_cache_snapshot).
+        """
+        if file_data.get('skip'):
+            self.search_index.remove(file_data['path'])
+            return
+        entry = self._scan_entries.get(file_data['rel_path'])
+        derived = entry['derived'] if entry else {}
+        self.search_index.add(file_data, derived.pop('tokens', {}), derived.get('symbols', ()))
+
+    def _scan_cache_snapshot(self):
+        """The scan cache save() arguments for the current project: a copy of the entries and the index image."""
+        with self._lock:
+            return dict(self._scan_entries), self.search_index.dump()
+
+    def _schedule_cache_save(self):
+        """
+        Schedules a save of the current project's scan cache (call with the lock held).
+        The snapshot is taken when the save runs, coalesced with other changes made
+        in the next SAVE_DELAY seconds, and written outside the lock.
+        """
+        if not self.scan_cache:
+            return
+        entries, index = self._scan_entries, self.search_index
+
+        def snapshot():
+            with self._lock:
+                return dict(entries), index.dump()
+        self.scan_cache.save_later(snapshot)
 
     def get_files(self):
         """Returns the list of loaded files."""
         return self.files
 
+    def get_file_by_path(self, path):
+        """Returns the loaded FileRecord with this absolute path, or None. O(1)."""
+        return self._by_path.get(path)
+
+    def get_file_by_rel_path(self, rel_path):
+        """Returns the loaded FileRecord with this project-relative path, or None. O(1)."""
+        return self._by_rel_path.get(rel_path)
+
+    def get_files_by_paths(self, paths):
+        """Returns the loaded files for the given absolute paths, in order, skipping unknown ones."""
+        by_path = self._by_path
+        return [by_path[p] for p in paths if p in by_path]
+
+    def get_file_content(self, file):
+        """
+        Returns the text of a loaded file (a FileRecord from get_files()).
+        Content is loaded lazily and may be evicted, so always go through this accessor.
+        """
+        return self.content_store.get(file['path'])
+
     def get_directory_tree(self):
         """
         Generates a text representation of the project's directory tree.
-        Respects the same ignore rules as _scan_directory.
+        Built from the same walk as the file scan, so it respects the same ignore rules.
         """
-        if not self.current_project_path:
+        walk = self.get_walk_result()
+        if not walk:
             return ""
-        
-        IGNORE_DIRS = {'.git', '__pycache__', 'node_modules', 'venv', 'env', '.idea', '.vscode', '.next', 'dist', 'build'}
-        lines = [os.path.basename(self.current_project_path) + "/"]
-        
-        def _build_tree(dir_path, prefix=""):
-            try:
-                entries = sorted(os.listdir(dir_path))
-            except PermissionError:
-                return
-            
-            # Filter out hidden and ignored directories/files
-            dirs = []
-            files = []
-            for entry in entries:
-                if entry.startswith('.') and entry not in ('.env',):
-                    continue
-                full_path = os.path.join(dir_path, entry)
-                if os.path.isdir(full_path):
-                    if entry not in IGNORE_DIRS:
-                        dirs.append(entry)
-                else:
-                    files.append(entry)
-            
-            all_entries = dirs + files
-            for i, entry in enumerate(all_entries):
-                is_last = (i == len(all_entries) - 1)
-                connector = "└── " if is_last else "├── "
-                full_path = os.path.join(dir_path, entry)
-                
-                if os.path.isdir(full_path):
-                    lines.append(f"{prefix}{connector}{entry}/")
-                    extension = "    " if is_last else "│   "
-                    _build_tree(full_path, prefix + extension)
-                else:
-                    lines.append(f"{prefix}{connector}{entry}")
-        
-        _build_tree(self.current_project_path)
-        return "\n".join(lines)
+        return render_tree(walk.tree)
 
-    def find_relevant_files(self, user_query, relevant_files_subset=None):
+    def find_relevant_files(self, user_query, relevant_files_subset=None, ranker=None, should_cancel=None):
         """
         Finds files that are most relevant to the user_query.
-        This is a simple heuristic based on keyword overlap.
         
         Args:
             user_query: The user's text description.
             relevant_files_subset: Optional list of file dicts to search within. 
                                    If None, searches all project files.
+            ranker: Optional ranker name overriding the config.
+            should_cancel: Optional callable checked while scoring; when it returns
+                           True the search stops by raising SearchCancelled.
         
         Returns:
             List of file dicts sorted by relevance.
         """
+        return self.search_files(
+            user_query, relevant_files_subset=relevant_files_subset, ranker=ranker, should_cancel=should_cancel
+        )[0]
+
+    def search_files(self, user_query, k=None, relevant_files_subset=None, extensions=None, ranker=None,
+                     should_cancel=None, proximity=None):
+        """
+        Scores files against user_query and returns the k most relevant.
+        Files are scored from the search index by the configured ranker
+        ('keyword' overlap heuristic by default, or 'bm25' / 'tfidf'), so only
+        the postings of the query tokens are touched, and the best k are picked
+        with a heap instead of sorting every match. Ties keep project (or subset) order.
+        For multi-word queries the best candidates are then re-ranked by how
+        close together (or as a phrase) the words appear in them.
+
+        A user_query starting with QUERY_PREFIX may use the query syntax
+        ("phrases", -word, path:glob, re:pattern, see parse_query_syntax); its filters
+        narrow the docs before scoring (see _filter_docs), and a query made only of
+        filters lists every file passing them. Any other text is plain search words.
+        
+        Args:
+            k: Maximum number of files to return (None = all matches).
+            extensions: Optional tuple of lowercase suffixes ('.py', ...); other files are left
+                        out before scoring (through the index's extension partitions).
+            proximity: Whether to apply the phrase/proximity stage (None = from config).
+            (other arguments as in find_relevant_files)
+        
+        Returns:
+            (files sorted by relevance, total number of matching files)
+        """
         target_files = relevant_files_subset if relevant_files_subset is not None else self.files
         if not target_files:
-            return []
+            return [], 0
 
-        scored_files = []
-        query_tokens = set(user_query.lower().split())
+        query = parse_query(user_query)
+        query_tokens = query.score_tokens # Query order is kept for phrase matching
+        if not query_tokens and not query.has_filters:
+            return [], 0
+        if proximity is None:
+            proximity = self.config_manager.get_proximity_scoring() if self.config_manager else True
 
-        for file in target_files:
-            score = 0
-            content_lower = file['content'].lower()
-            path_lower = file['rel_path'].lower()
-            
-            # Simple scoring:
-            # +10 for filename matching tokens
-            # +1 for content matching tokens
-            
-            for token in query_tokens:
-                if len(token) < 3: continue # Skip short words
-                
-                if token in path_lower:
-                    score += 10
-                if token in content_lower:
-                    # Count occurrences (capped to avoid dominance by large files)
-                    count = content_lower.count(token)
-                    score += min(count, 5) 
-            
-            if score > 0:
-                scored_files.append((score, file))
+        with self._lock:
+            index = self.search_index
+            ranker = self._get_ranker(ranker)
+            if relevant_files_subset is None:
+                # The extension filter becomes a doc set before scoring
+                docs = index.docs_with_suffixes(extensions) if extensions else None
+                if query.has_filters:
+                    docs = self._filter_docs(index, query, docs, should_cancel)
+                if query_tokens:
+                    scores = self._scorer.score(
+                        ranker, index, self.generation, query_tokens, should_cancel,
+                        docs=docs, scope=(extensions or None, query.key() if query.has_filters else None)
+                    )
+                else:
+                    scores = dict.fromkeys(sorted(docs), 0) # Filters only: every file passing them
+                # Doc ids follow project order; metadata-only files are not indexed
+                candidates = [
+                    (score, doc_id, index.doc(doc_id)) for doc_id, score in scores.items()
+                    if score > 0 or not query_tokens
+                ]
+            else:
+                if extensions:
+                    target_files = [f for f in target_files if f['rel_path'].lower().endswith(extensions)]
+                scores = self._scorer.score(ranker, index, self.generation, query_tokens, should_cancel)
+                passing = None
+                if query.has_filters:
+                    subset_docs = {index.doc_id(f['path']) for f in target_files} - {None}
+                    passing = self._filter_docs(index, query, subset_docs, should_cancel)
+                candidates = []
+                for i, file in enumerate(target_files):
+                    if i % 1024 == 0:
+                        check_cancelled(should_cancel)
+                    if file.get('skip'):
+                        continue # Metadata-only (binary, minified, oversized, generated)
+                    doc_id = index.doc_id(file['path'])
+                    if doc_id is None: # Not a loaded file
+                        if passing is not None and not query.matches(file['rel_path'], self.get_file_content(file)):
+                            continue
+                        score = self._keyword_score_file(file, query_tokens)
+                    else:
+                        if passing is not None and doc_id not in passing:
+                            continue
+                        score = scores.get(doc_id, 0)
+                    if score > 0 or not query_tokens:
+                        candidates.append((score, i, file))
 
-        # Sort by score descending
-        scored_files.sort(key=lambda x: x[0], reverse=True)
-        
-        # Return just the file objects
-        return [f[1] for f in scored_files]
+            phrase_tokens = [t for t in query_tokens if TOKEN_RE.fullmatch(t)]
+            if proximity and len(phrase_tokens) >= 2 and candidates:
+                candidates = self._apply_proximity(index, ranker, phrase_tokens, candidates, should_cancel)
+
+        check_cancelled(should_cancel)
+        rank_key = lambda c: (-c[0], c[1]) # Score descending, then original order
+        if k is not None and k < len(candidates):
+            top = heapq.nsmallest(k, candidates, key=rank_key)
+        else:
+            top = sorted(candidates, key=rank_key)
+        return [c[2] for c in top], len(candidates)
+
+    def _filter_docs(self, index, query, docs=None, should_cancel=None):
+        """
+        Returns the doc ids (of docs, or of the whole index) passing the filters of a query.
+
+        Clauses the index answers run first: the words of a phrase must all
+        appear, excluded words drop the docs whose content or path contains
+        them, and path patterns are checked against the in-memory paths
+        (substrings through the path index). Only the survivors are read, to
+        verify phrases and, last, regexes, so the costly scans touch as few
+        files as possible.
+        """
+        docs = index.doc_ids() if docs is None else set(docs)
+        filters = query.filters
+        for clause in filters:
+            check_cancelled(should_cancel)
+            if not docs:
+                return docs
+            if clause.kind == TERM:
+                docs -= set(index.content_counts(clause.value, docs))
+                docs -= index.path_matches(clause.value, docs)
+            elif clause.kind == PHRASE and not clause.negated:
+                for word in TOKEN_RE.findall(clause.value):
+                    docs &= set(index.content_counts(word, docs))
+            elif clause.kind == PATH:
+                if clause.is_glob:
+                    matching = {d for d in docs if clause.matches_path(index.doc(d)['rel_path'].lower())}
+                else:
+                    matching = index.path_matches(clause.value, docs)
+                docs = docs - matching if clause.negated else matching
+
+        # Content verification: phrases first, regexes last
+        for kind in (PHRASE, REGEX):
+            for clause in filters:
+                if clause.kind != kind or not docs:
+                    continue
+                to_read = docs
+                if clause.kind == PHRASE and clause.negated:
+                    # Docs missing a word of the phrase pass without being read
+                    for word in TOKEN_RE.findall(clause.value):
+                        to_read = set(index.content_counts(word, to_read))
+                found = set()
+                for i, doc_id in enumerate(sorted(to_read)):
+                    if i % 256 == 0:
+                        check_cancelled(should_cancel)
+                    if clause.pattern.search(self.get_file_content(index.doc(doc_id))):
+                        found.add(doc_id)
+                docs = docs - found if clause.negated else found
+        return docs
+
+    def _apply_proximity(self, index, ranker, tokens, candidates, should_cancel=None):
+        """
+        Phrase/proximity stage over the PROXIMITY_CANDIDATES best candidates.
+        A file gets ranker.PROXIMITY_BOOST scaled by how tight the smallest
+        window holding every token is (in words of PROXIMITY_WORD_CHARS
+        characters), plus ranker.PHRASE_BOOST if the tokens appear
+        consecutively in query order. Token offsets come from the index's lazy
+        positional index, which only searches these files for these tokens.
+        """
+        best = heapq.nsmallest(self.PROXIMITY_CANDIDATES, candidates, key=lambda c: (-c[0], c[1]))
+        bonuses = {}
+        for _, order, file in best:
+            check_cancelled(should_cancel)
+            doc_id = index.doc_id(file['path'])
+            if doc_id is None:
+                continue # Not indexed (outside the loaded project)
+            position_lists = index.token_positions(doc_id, tokens)
+            span = min_span(position_lists)
+            if span is None:
+                continue # Some token only matches the path, or only inside longer words
+            words = span / self.PROXIMITY_WORD_CHARS
+            bonus = ranker.PROXIMITY_BOOST * (len(tokens) - 1) / max(words, len(tokens) - 1)
+            if has_phrase(position_lists, [len(token) for token in tokens]):
+                bonus += ranker.PHRASE_BOOST
+            bonuses[order] = bonus
+        return [(score + bonuses.get(order, 0), order, file) for score, order, file in candidates]
+
+    def _get_ranker(self, name=None):
+        """Returns the ranker instance for name (default: from config), reusing the last one."""
+        if name is None:
+            name = self.config_manager.get_search_ranker() if self.config_manager else DEFAULT_RANKER
+        if self._ranker is None or self._ranker.name != name:
+            self._ranker = get_ranker(name)
+        return self._ranker
+
+    def _keyword_score_file(self, file, query_tokens):
+        """Keyword ranker scoring for a single file, straight from its content."""
+        score = 0
+        content_lower = self.get_file_content(file).lower()
+        path_lower = file['rel_path'].lower()
+        for token in query_tokens:
+            if token in path_lower:
+                score += 10
+            score += min(content_lower.count(token), 5)
+        return score
 
     def replace_region(self, region_name, new_content):
         """
@@ -191,81 +897,172 @@ class ProjectManager:
             rf')'
         )
         
-        for file_data in self.files:
-            content = file_data['content']
-            if not content:
-                continue
+        with self._lock:
+            for file_data in self.files:
+                if file_data.get('skip'):
+                    continue
+                content = self.get_file_content(file_data)
+                if not content:
+                    continue
                 
-            new_file_content, count = re.subn(regex_pattern, new_content, content, flags=re.DOTALL | re.IGNORECASE)
+                new_file_content, count = re.subn(regex_pattern, new_content, content, flags=re.DOTALL | re.IGNORECASE)
             
-            if count > 0:
-                print(f"ProjectManager: Replaced region '{region_name}' in {file_data['rel_path']}")
-                file_data['content'] = new_file_content
-                # Save to disk
-                try:
-                    with open(file_data['path'], 'w', encoding='utf-8') as f:
-                        f.write(new_file_content)
-                    found = True
-                except Exception as e:
-                    print(f"ProjectManager: Error saving file {file_data['path']}: {e}")
-                    
+                if count > 0:
+                    print(f"ProjectManager: Replaced region '{region_name}' in {file_data['rel_path']}")
+                    # Save to disk
+                    try:
+                        with open(file_data['path'], 'w', encoding='utf-8') as f:
+                            f.write(new_file_content)
+                        st = os.stat(file_data['path'])
+                        file_data['size'] = st.st_size
+                        file_data['mtime'] = st.st_mtime_ns
+                        self.content_store.put(file_data['path'], new_file_content)
+                        self._scan_entries[file_data['rel_path']] = self._build_scan_entry(
+                            file_data, new_file_content.encode('utf-8'), new_file_content
+                        )
+                        self._index_file(file_data)
+                        found = True
+                    except Exception as e:
+                        print(f"ProjectManager: Error saving file {file_data['path']}: {e}")
+
+            if found:
+                self.generation += 1
+                self._schedule_cache_save()
         return found
 
     def get_non_code_files(self):
         """
-        Scans the project directory for files NOT in CODE_EXTENSIONS.
+        Returns the project files NOT in CODE_EXTENSIONS, from the cached project walk.
         Returns list of dicts: {'path': abs_path, 'rel_path': relative_path}
         """
-        if not self.current_project_path:
+        walk = self.get_walk_result()
+        if not walk:
             return []
-
-        non_code = []
-        IGNORE_DIRS = {'.git', '__pycache__', 'node_modules', 'venv', 'env',
-                       '.idea', '.vscode', '.next', 'dist', 'build'}
-
-        for root, dirs, filenames in os.walk(self.current_project_path):
-            # Filter dirs in-place to skip ignored
-            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS and not d.startswith('.')]
-
-            for filename in filenames:
-                if filename.startswith('.'):
-                    continue
-                ext = os.path.splitext(filename)[1].lower()
-                if ext not in self.CODE_EXTENSIONS:
-                    full_path = os.path.join(root, filename)
-                    non_code.append({
-                        'path': full_path,
-                        'rel_path': os.path.relpath(full_path, self.current_project_path)
-                    })
-
-        return non_code
+        return walk.non_code_files
 
     def extract_functions(self):
         """
         Extracts all function definitions from loaded code files.
-        Returns a list of dicts: {
+        Returns a list of SymbolRecords with dict-style access to: {
             'name': str,
             'type': 'function',
-            'content': str,
+            'content': str (sliced from the file on access),
             'file_rel_path': str,
             'path': str (formatted for UI: "file:line")
         }
+        Files are only parsed again when their content hash changes (see SymbolTable),
+        and the list is reused while the project is unchanged; it must not be modified.
+        Parsing happens outside the project lock: a first call on a large project takes
+        seconds, so the UI runs it in the background (see functions_ready).
+        The extracted symbols are persisted in the scan cache ('functions' in the derived
+        data), so a later session only parses the files that changed in between.
         """
-        functions = []
-        for f in self.files:
-            ext = os.path.splitext(f['path'])[1].lower()
-            content = f['content']
-            lines = content.split('\n')
-            
-            if ext == '.py':
-                functions.extend(self._extract_python_functions(f, lines))
-            elif ext in ('.js', '.jsx', '.ts', '.tsx'):
-                functions.extend(self._extract_js_functions(f, content, lines))
-                
+        with self._lock:
+            symbol_table = self.symbol_table
+            generation = self.generation
+            code_files = [
+                f for f in self.files
+                if not f.get('skip') and os.path.splitext(f['path'])[1].lower() in self.SYMBOL_EXTENSIONS
+            ]
+            hashes = {f['path']: self._content_hash(f) for f in code_files}
+            stored = {}
+            for f in code_files:
+                entry = self._scan_entries.get(f['rel_path'])
+                if entry and entry['hash'] and 'functions' in entry['derived']:
+                    stored[entry['hash']] = entry['derived']['functions']
+        functions = symbol_table.functions(
+            generation, code_files, lambda f: hashes[f['path']], self._extract_file_functions, stored
+        )
+        self._persist_functions(symbol_table, code_files, hashes)
         return functions
 
-    def _extract_python_functions(self, file_info, lines):
+    def _persist_functions(self, symbol_table, code_files, hashes):
+        """Adds the symbols of freshly parsed files to their scan entries and schedules a cache save."""
+        with self._lock:
+            if symbol_table is not self.symbol_table or not self.scan_cache:
+                return # Project switched meanwhile
+            changed = False
+            for f in code_files:
+                entry = self._scan_entries.get(f['rel_path'])
+                digest = hashes[f['path']]
+                if entry is None or digest is None or entry['hash'] != digest or 'functions' in entry['derived']:
+                    continue
+                symbols = symbol_table.symbols(digest)
+                if symbols is not None:
+                    # New dicts: a pending cache save may be serializing the old ones
+                    self._scan_entries[f['rel_path']] = dict(entry, derived=dict(entry['derived'], functions=symbols))
+                    changed = True
+            if changed:
+                self._schedule_cache_save()
+
+    def functions_ready(self):
+        """True if extract_functions would return at once, without parsing any file."""
+        with self._lock:
+            return self.symbol_table.is_current(self.generation)
+
+    def _content_hash(self, file):
+        """Content hash of a file from its scan entry, or None if unknown."""
+        entry = self._scan_entries.get(file['rel_path'])
+        return entry.get('hash') if entry else None
+
+    def _extract_file_functions(self, file):
+        """Parses the functions of one .py or JS/TS file."""
+        content = self.get_file_content(file)
+        lines = content.split('\n')
+        if os.path.splitext(file['path'])[1].lower() == '.py':
+            return self._extract_python_functions(file, content, lines)
+        return self._extract_js_functions(file, content, lines)
+
+    @staticmethod
+    def _line_offsets(lines):
+        """Character offset of the start of each line in '\\n'.join(lines)."""
+        offsets = []
+        pos = 0
+        for line in lines:
+            offsets.append(pos)
+            pos += len(line) + 1
+        return offsets
+
+    def _extract_python_functions(self, file_info, content, lines):
+        """
+        Functions and methods of a Python file, from a single ast parse.
+        Names are qualified by their enclosing classes ('Class.method'); the
+        source spans from the first decorator to the last line of the body.
+        Functions nested in functions are part of their parent. Files that do
+        not parse fall back to the line regex (unqualified names, no decorators).
+        """
+        try:
+            tree = ast.parse(content, filename=PARSE_FILENAME)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            return self._extract_python_functions_regex(file_info, lines)
+        offsets = self._line_offsets(lines)
+        results = []
+
+        def visit(parent, prefix):
+            for node in ast.iter_child_nodes(parent):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    line = node.lineno - 1
+                    first_line = node.decorator_list[0].lineno - 1 if node.decorator_list else line
+                    end_line = node.end_lineno - 1
+                    results.append(SymbolRecord(
+                        prefix + node.name, file_info, line, offsets[first_line],
+                        offsets[end_line] + len(lines[end_line]), self.content_store,
+                        first_line=first_line, end_line=end_line
+                    ))
+                elif isinstance(node, ast.ClassDef):
+                    visit(node, f"{prefix}{node.name}.")
+                elif not isinstance(node, (ast.expr, ast.expr_context)):
+                    visit(node, prefix) # if / try / with / for blocks
+        try:
+            visit(tree, "")
+        except RecursionError:
+            return self._extract_python_functions_regex(file_info, lines)
+        return results
+
+    def _extract_python_functions_regex(self, file_info, lines):
+        """Line regex extractor: definitions until the next line with the same or less indentation."""
         results = []
+        offsets = self._line_offsets(lines)
         # Regex for Python function/method definitions
         # Groups: 1: indentation, 2: 'async ' (optional), 3: 'def ', 4: function name
         py_fn_pattern = re.compile(r'^([ \t]*)((?:async\s+)?def\s+)([a-zA-Z_]\w*)\s*\(')
@@ -298,74 +1095,64 @@ class ProjectManager:
                 while end_line > start_line + 1 and not lines[end_line - 1].strip():
                     end_line -= 1
                     
-                fn_content = '\n'.join(lines[start_line:end_line])
-                results.append({
-                    'name': fn_name,
-                    'type': 'function',
-                    'content': fn_content,
-                    'file_rel_path': file_info['rel_path'],
-                    'path': f"{file_info['path']}:{start_line+1}"
-                })
+                # Offsets of '\n'.join(lines[start_line:end_line])
+                start = offsets[start_line]
+                end = offsets[end_line - 1] + len(lines[end_line - 1])
+                results.append(SymbolRecord(
+                    fn_name, file_info, start_line, start, end, self.content_store, end_line=end_line - 1
+                ))
                 i = end_line - 1
             i += 1
         return results
 
     def _extract_js_functions(self, file_info, content, lines):
+        """
+        Functions of a JS/TS file. One scan of the source (see scan_js) matches
+        braces and parentheses while skipping strings, template literals,
+        comments and regex literals; each definition found by the line patterns
+        then spans from its line start to the brace closing its body.
+        Definitions inside comments or strings are ignored, and arrow functions
+        without a braced body (like bodiless declarations) are just their line.
+        """
         results = []
-        # Basic regex to find starts of functions
-        # This is a heuristic and might miss some complex cases, but covers most common ones
-        
-        # 1. function keyword: function name(...) {
-        js_fn_keyword = re.compile(r'(?:export\s+)?(?:async\s+)?function\s+([a-zA-Z_]\w*)\s*\(')
-        # 2. Arrow functions assigned to const/let/var: const name = (...) => {
-        js_arrow_fn = re.compile(r'(?:export\s+)?(?:const|let|var)\s+([a-zA-Z_]\w*)\s*=\s*(?:async\s+)?(?:\([^)]*\)|[a-zA-Z_]\w*)\s*=>')
-        # 3. Method definitions in objects/classes: name(...) {
-        js_method = re.compile(r'^[ \t]*([a-zA-Z_]\w*)\s*\([^)]*\)\s*\{')
+        offsets = self._line_offsets(lines)
+        structure = scan_js(content)
 
         for i, line in enumerate(lines):
-            name = None
-            match = js_fn_keyword.search(line) or js_arrow_fn.search(line) or js_method.match(line)
-            
-            if match:
-                name = match.group(1)
-                start_line = i
-                
-                # For JS, extracting the full body is harder because of nesting.
-                # We'll use a simple brace counting heuristic starting from the first '{' found
-                # Or if it's an arrow function without braces (single expression), it's just that line (or until ;)
-                
-                start_idx = content.find(line)
-                # Find the first '{'
-                brace_start = content.find('{', start_idx)
-                
-                if brace_start != -1 and (brace_start < content.find('\n', start_idx + len(line)) or '\n' not in line):
-                    # Brace counting
-                    count = 1
-                    current_idx = brace_start + 1
-                    while count > 0 and current_idx < len(content):
-                        char = content[current_idx]
-                        if char == '{':
-                            count += 1
-                        elif char == '}':
-                            count -= 1
-                        current_idx += 1
-                    
-                    fn_content = content[start_idx:current_idx]
-                    results.append({
-                        'name': name,
-                        'type': 'function',
-                        'content': fn_content,
-                        'file_rel_path': file_info['rel_path'],
-                        'path': f"{file_info['path']}:{start_line+1}"
-                    })
-                else:
-                    # Likely single line arrow function or we missed the brace
-                    # Just take the line for now as a fallback
-                    results.append({
-                        'name': name,
-                        'type': 'function',
-                        'content': line.strip(),
-                        'file_rel_path': file_info['rel_path'],
-                        'path': f"{file_info['path']}:{start_line+1}"
-                    })
+            match = JS_FN_KEYWORD_RE.search(line) or JS_ARROW_FN_RE.search(line) or JS_METHOD_RE.match(line)
+            if not match or match.group(1) in JS_CONTROL_KEYWORDS:
+                continue
+            line_start = offsets[i]
+            if not structure.is_code(line_start + match.start(1)):
+                continue
+            name = match.group(1)
+
+            body = -1
+            if match.re is JS_METHOD_RE:
+                body = line_start + match.end() - 1 # The pattern ends at the '{'
+            elif match.re is JS_ARROW_FN_RE:
+                rest = line[match.end():].lstrip()
+                after_arrow = line_start + len(line) - len(rest)
+                if rest.startswith('{') and structure.is_code(after_arrow):
+                    body = after_arrow
+            else:
+                close = structure.parens.get(line_start + match.end() - 1)
+                if close is not None:
+                    body = structure.brace_after(close)
+                    if body != -1 and content.find(';', close, body) != -1:
+                        body = -1 # A declaration without body (e.g. TS overloads)
+
+            if body != -1:
+                close = structure.braces.get(body)
+                end = close + 1 if close is not None else len(content)
+                results.append(SymbolRecord(
+                    name, file_info, i, line_start, end, self.content_store,
+                    end_line=bisect_right(offsets, end - 1) - 1
+                ))
+            else:
+                # Expression-bodied arrow function or declaration: just the line (stripped)
+                start = line_start + len(line) - len(line.lstrip())
+                results.append(SymbolRecord(
+                    name, file_info, i, start, start + len(line.strip()), self.content_store, end_line=i
+                ))
         return results
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+
+class ResidentProjectCache:
+    """
+    Keeps the loaded state of recently used projects in memory.
+
+    When the user switches away from a project its state (files, indexes,
+    cached contents) is parked here instead of being discarded, so switching
+    back is a swap instead of a rescan. The cache holds at most max_projects
+    states and evicts the least recently used ones while the estimated memory
+    of all parked states exceeds memory_cap bytes.
+
+    Neighbouring projects can be pre-warmed on a background thread. Projects
+    seen to exceed memory_cap on their own are remembered and not pre-warmed
+    again, since loading them would only be thrown away.
+    """
+
+    def __init__(self, max_projects=2, memory_cap=256 * 1024 * 1024):
+        self.max_projects = max_projects
+        self.memory_cap = memory_cap
+        self._states = OrderedDict() # {project_path: (state, estimated_bytes)}
+        self._lock = threading.Lock()
+        self._prewarm_thread = None
+        self._prewarm_queue = []
+        self._loading = set()
+        self._oversize = {} # {project_path: estimated bytes} of states larger than memory_cap
+
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._states
+
+    def take(self, path):
+        """Removes and returns the parked state of path, or None."""
+        with self._lock:
+            item = self._states.pop(path, None)
+        return item[0] if item else None
+
+    def park(self, path, state, estimated_bytes):
+        """Parks a project state, evicting old ones to respect the limits."""
+        if self.max_projects <= 0:
+            return
+        with self._lock:
+            if estimated_bytes > self.memory_cap:
+                self._oversize[path] = estimated_bytes
+                return
+            self._oversize.pop(path, None) # May have shrunk since
+            self._states.pop(path, None)
+            self._states[path] = (state, estimated_bytes)
+            self._evict()
+
+    def _evict(self):
+        while self._states and (
+            len(self._states) > self.max_projects or self._used_bytes() > self.memory_cap
+        ):
+            path, _ = self._states.popitem(last=False)
+            print(f"ResidentProjectCache: Evicted {path}")
+
+    def _used_bytes(self):
+        return sum(size for _, size in self._states.values())
+
+    def used_bytes(self):
+        with self._lock:
+            return self._used_bytes()
+
+    def resident_paths(self):
+        with self._lock:
+            return list(self._states.keys())
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._prewarm_queue = []
+
+    def prewarm(self, paths, loader, skip=None):
+        """
+        Loads the given projects on a background thread and parks them.
+
+        Args:
+            paths: Project paths in priority order. Already resident and oversize ones are skipped.
+            loader: Callable(path) -> (state, estimated_bytes), runs on the background thread.
+            skip: Optional callable(path) -> bool evaluated right before parking
+                  (e.g. the project became the current one meanwhile).
+        """
+        with self._lock:
+            self._prewarm_queue = [p for p in paths if p not in self._states and p not in self._oversize]
+            if not self._prewarm_queue or (self._prewarm_thread and self._prewarm_thread.is_alive()):
+                return
+            self._prewarm_thread = threading.Thread(
+                target=self._run_prewarm, args=(loader, skip), name="project-prewarm", daemon=True
+            )
+            self._prewarm_thread.start()
+
+    def _run_prewarm(self, loader, skip):
+        while True:
+            with self._lock:
+                if not self._prewarm_queue:
+                    return
+                path = self._prewarm_queue.pop(0)
+                if path in self._states or path in self._loading:
+                    continue
+                self._loading.add(path)
+            try:
+                if skip and skip(path):
+                    continue
+                state, estimated_bytes = loader(path)
+                if skip and skip(path):
+                    continue
+                self.park(path, state, estimated_bytes)
+                if path in self._oversize:
+                    print(f"ResidentProjectCache: {path} exceeds the memory cap, it will not be pre-warmed again")
+                    continue
+                print(f"ResidentProjectCache: Pre-warmed {path} (~{estimated_bytes / (1024 * 1024):.1f} MB)")
+            except Exception as e:
+                print(f"ResidentProjectCache: Error pre-warming {path}: {e}")
+            finally:
+                with self._lock:
+                    self._loading.discard(path)
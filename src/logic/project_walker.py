@@ -0,0 +1,128 @@
+import os
+from src.logic.ignore_rules import IgnoreMatcher
+
+# Directories never descended into (hidden directories are always skipped too)
+IGNORE_DIRS = {
+    '.git', '__pycache__', 'node_modules', 'venv', 'env',
+    '.idea', '.vscode', '.next', 'dist', 'build'
+}
+
+# Hidden files that are still shown in the directory tree
+VISIBLE_DOTFILES = {'.env'}
+
+
+def is_ignored_dir(name):
+    """True if a directory with this name is skipped by every scan."""
+    return name in IGNORE_DIRS or name.startswith('.')
+
+
+class WalkResult:
+    """
+    Everything a single pass over the project produces.
+
+    Attributes:
+        code_files: [(abs_path, rel_path, size, mtime_ns)] in walk order.
+        non_code_files: [{'path': abs_path, 'rel_path': rel_path}] in walk order.
+        tree: Nested {'name': str, 'dirs': [tree, ...], 'files': [name, ...]} model of the project.
+        dirs: [rel_path] of every directory visited (used to detect structural changes).
+        matcher: The IgnoreMatcher used for the walk, including nested .gitignore rules.
+    """
+
+    def __init__(self, root, matcher=None):
+        self.root = root
+        self.matcher = matcher or IgnoreMatcher()
+        self.code_files = []
+        self.non_code_files = []
+        self.dirs = []
+        self.tree = {'name': os.path.basename(os.path.normpath(root)), 'dirs': [], 'files': []}
+
+    def structure_key(self):
+        """Identifies the non-code part of the walk (directories and non-code files)."""
+        return (tuple(self.dirs), tuple(f['rel_path'] for f in self.non_code_files))
+
+
+def walk_project(root, code_extensions, extra_patterns=()):
+    """
+    Walks the project once with os.scandir and builds code files, non-code
+    files and the directory tree model. Directories matched by IGNORE_DIRS,
+    .gitignore rules or extra_patterns (gitignore syntax) are pruned before
+    being entered. Entries are visited in sorted order so results are deterministic.
+    """
+    result = WalkResult(root, IgnoreMatcher.for_project(root, extra_patterns))
+    _walk_dir(root, "", result.tree, result, code_extensions)
+    return result
+
+
+def _walk_dir(dir_path, rel_dir, node, result, code_extensions):
+    try:
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+
+    matcher = result.matcher
+    if rel_dir and any(e.name == '.gitignore' for e in entries):
+        matcher.add_file(os.path.join(dir_path, '.gitignore'), base=rel_dir)
+
+    subdirs = []
+    for entry in entries:
+        name = entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+
+        rel_path = os.path.join(rel_dir, name) if rel_dir else name
+        if is_dir:
+            if not is_ignored_dir(name) and not (matcher and matcher.is_ignored(rel_path, is_dir=True)):
+                subdirs.append((entry, rel_path))
+            continue
+
+        if name.startswith('.'):
+            if name in VISIBLE_DOTFILES:
+                node['files'].append(name)
+            continue
+
+        if matcher and matcher.is_ignored(rel_path):
+            continue
+
+        node['files'].append(name)
+        ext = os.path.splitext(name)[1].lower()
+        if ext in code_extensions:
+            try:
+                st = entry.stat()
+            except OSError as e:
+                print(f"Error reading file {entry.path}: {e}")
+                continue
+            result.code_files.append((entry.path, rel_path, st.st_size, st.st_mtime_ns))
+        else:
+            result.non_code_files.append({'path': entry.path, 'rel_path': rel_path})
+
+    # Files of a directory come before its subdirectories, like os.walk
+    for entry, child_rel in subdirs:
+        child = {'name': entry.name, 'dirs': [], 'files': []}
+        node['dirs'].append(child)
+        result.dirs.append(child_rel)
+        if entry.is_symlink():
+            continue # Listed, but not followed (avoids cycles)
+        _walk_dir(entry.path, child_rel, child, result, code_extensions)
+
+
+def render_tree(tree):
+    """Renders a tree model as the text shown in implementation prompts."""
+    lines = [tree['name'] + "/"]
+
+    def _render(node, prefix):
+        all_entries = [(d['name'], d) for d in node['dirs']] + [(f, None) for f in node['files']]
+        for i, (name, child) in enumerate(all_entries):
+            is_last = (i == len(all_entries) - 1)
+            connector = "└── " if is_last else "├── "
+            if child is not None:
+                lines.append(f"{prefix}{connector}{name}/")
+                extension = "    " if is_last else "│   "
+                _render(child, prefix + extension)
+            else:
+                lines.append(f"{prefix}{connector}{name}")
+
+    _render(tree, "")
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+import os
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _EventCollector(FileSystemEventHandler):
+    """Collects watchdog events into the watcher's pending set."""
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = [event.src_path]
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            paths.append(dest_path)
+        project_manager = self.watcher.project_manager
+        if event.is_directory:
+            if event.event_type == 'modified':
+                return # Reported along with the file events that caused it
+            if all(project_manager.is_path_ignored(p, is_dir=True) for p in paths):
+                return # e.g. node_modules or build output being rewritten
+            # Directory moves/deletes can affect many files at once: resync everything
+            self.watcher._request_resync()
+            return
+        paths = [p for p in paths if not project_manager.is_path_ignored(p) or self.watcher.is_rules_file(p)]
+        if paths:
+            self.watcher._add_pending(paths)
+
+
+class ProjectWatcher:
+    """
+    Keeps a loaded project in sync with the filesystem.
+
+    Uses watchdog (inotify on Linux, FSEvents on macOS) when it is installed
+    and falls back to a thread that polls file stats otherwise. Changes are
+    applied to the ProjectManager as add/modify/delete deltas and reported to
+    on_change(summary) from the watcher thread.
+    """
+
+    DEFAULT_POLL_INTERVAL = 2.0
+
+    # How long to wait for more events before applying a batch (event backend)
+    EVENT_BATCH_DELAY = 0.3
+
+    # How long stop() waits for the worker thread to finish its current batch
+    STOP_TIMEOUT = 5.0
+
+    def __init__(self, project_manager, on_change=None, poll_interval=None):
+        self.project_manager = project_manager
+        self.on_change = on_change
+        self.poll_interval = poll_interval or self.DEFAULT_POLL_INTERVAL
+        self.root_path = project_manager.current_project_path
+        self._observer = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._pending = set()
+        self._resync = True # Always reconcile once on start
+        self._pending_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return "watchdog" if self._observer else "polling"
+
+    def start(self):
+        """Starts watching the project loaded in the ProjectManager."""
+        if not self.root_path or self._thread:
+            return
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_EventCollector(self), self.root_path, recursive=True)
+                self._observer.daemon = True
+                self._observer.start()
+            except Exception as e:
+                print(f"ProjectWatcher: watchdog unavailable ({e}), falling back to polling")
+                self._observer = None
+        self._thread = threading.Thread(target=self._run, name="project-watcher", daemon=True)
+        self._thread.start()
+        print(f"ProjectWatcher: Watching {self.root_path} ({self.backend})")
+
+    def stop(self):
+        """Stops watching and waits for a batch in progress to finish. Safe to call more than once."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._observer:
+            try:
+                self._observer.stop()
+            except Exception:
+                pass
+            self._observer = None
+        thread, self._thread = self._thread, None
+        if thread and thread is not threading.current_thread():
+            thread.join(self.STOP_TIMEOUT)
+
+    @staticmethod
+    def is_rules_file(path):
+        """True for .gitignore files: changing one changes which paths the walk skips."""
+        return os.path.basename(path) == '.gitignore'
+
+    # --- Event backend ---
+    def _add_pending(self, paths):
+        with self._pending_lock:
+            self._pending.update(paths)
+        self._wake_event.set()
+
+    def _request_resync(self):
+        with self._pending_lock:
+            self._resync = True
+        self._wake_event.set()
+
+    # --- Worker thread ---
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self._observer:
+                self._wake_event.wait()
+                if self._stop_event.is_set():
+                    break
+                # Let bursts of events (e.g. a git checkout) settle into one batch
+                self._stop_event.wait(self.EVENT_BATCH_DELAY)
+                self._wake_event.clear()
+            with self._pending_lock:
+                pending, self._pending = self._pending, set()
+                resync, self._resync = self._resync, False
+
+            try:
+                if resync or not self._observer:
+                    self._apply(*self._diff_full())
+                else:
+                    self._apply(*self._diff_paths(pending))
+            except Exception as e:
+                print(f"ProjectWatcher: Error syncing {self.root_path}: {e}")
+
+            if not self._observer:
+                self._stop_event.wait(self.poll_interval)
+
+    def _known_signatures(self):
+        """{abs_path: (size, mtime)} of the files currently loaded."""
+        return {f['path']: (f['size'], f['mtime']) for f in self.project_manager.get_files()}
+
+    def _diff_full(self):
+        """Compares a fresh walk with the loaded files."""
+        return self.project_manager.diff_with_disk()
+
+    def _diff_paths(self, paths):
+        """Classifies the paths reported by filesystem events."""
+        known = self._known_signatures()
+        added, modified, deleted = [], [], []
+        for p in paths:
+            if p not in known:
+                if self.is_rules_file(p):
+                    # Ignore rules changed: files may have appeared or vanished anywhere
+                    self.project_manager.invalidate_walk()
+                    self._request_resync()
+                    continue
+                if self.project_manager.is_path_ignored(p):
+                    continue # node_modules, .git, build output...: no rewalk needed
+            try:
+                st = os.stat(p)
+            except OSError:
+                if p in known:
+                    deleted.append(p)
+                else:
+                    self.project_manager.invalidate_walk()
+                continue
+            if p in known:
+                if known[p] != (st.st_size, st.st_mtime_ns):
+                    modified.append(p)
+            elif self.project_manager.is_code_file(p):
+                added.append(p)
+            else:
+                # A non-code file appeared: the cached tree/non-code listing is stale
+                self.project_manager.invalidate_walk()
+        return added, modified, deleted, None
+
+    def _apply(self, added, modified, deleted, walk_result):
+        if not (added or modified or deleted or walk_result):
+            return
+        if self._stop_event.is_set() or self.project_manager.current_project_path != self.root_path:
+            return # Project switched while we were diffing
+        summary = self.project_manager.apply_changes(
+            added=added, modified=modified, deleted=deleted, walk_result=walk_result, root_path=self.root_path
+        )
+        if any(summary.values()) and self.on_change:
+            self.on_change(summary)
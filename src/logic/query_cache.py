@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    LRU cache of search results.
+
+    Keys must include everything a result depends on (normalized query,
+    section, extension filter and the project generation), so entries never
+    need explicit invalidation: once the project changes its generation is
+    bumped and old entries simply stop being hit until they age out.
+    Cached lists are shared, callers must not modify them.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached result for key, or None."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns {'entries', 'hits', 'misses', 'hit_rate'}."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,185 @@
+import re
+import fnmatch
+
+# Kinds of clause
+TERM = 'term'
+PHRASE = 'phrase'
+PATH = 'path'
+REGEX = 're'
+
+# One clause: optional '-', optional 'path:' / 're:' prefix, then a "quoted" or bare value
+CLAUSE_RE = re.compile(r'(-?)(?:(path|re):)?(?:"([^"]*)"|(\S+))')
+
+# Characters that make a path clause a glob instead of a substring
+GLOB_CHARS = set('*?[')
+
+# Shortest term that is scored or excluded (shorter words are skipped, as in plain searches)
+MIN_TERM_LENGTH = 3
+
+# A query starting with this uses the query syntax; otherwise (e.g. a prompt) it is plain words
+QUERY_PREFIX = '?'
+
+
+class Clause:
+    """
+    One clause of a search query.
+
+    kind is TERM, PHRASE, PATH or REGEX; value is lowercased except for
+    regexes, which keep their case. pattern is the compiled regex that
+    verifies a PHRASE (whitespace-insensitive, ignoring case) or a REGEX
+    (multiline, so ^ and $ anchor at each line of the content).
+    """
+    __slots__ = ('kind', 'value', 'negated', 'pattern')
+
+    def __init__(self, kind, value, negated=False):
+        self.kind = kind
+        self.value = value
+        self.negated = negated
+        self.pattern = None
+        if kind == PHRASE:
+            self.pattern = re.compile(r'\s+'.join(re.escape(word) for word in value.split()), re.IGNORECASE)
+        elif kind == REGEX:
+            try:
+                self.pattern = re.compile(value, re.MULTILINE)
+            except re.error as e:
+                print(f"QueryParser: Invalid regex '{value}' ({e}), searching it literally")
+                self.pattern = re.compile(re.escape(value))
+
+    @property
+    def is_glob(self):
+        return self.kind == PATH and not GLOB_CHARS.isdisjoint(self.value)
+
+    def matches_path(self, rel_path_lower):
+        """PATH clauses: glob match of the whole lowercased rel_path, or substring."""
+        if self.is_glob:
+            return fnmatch.fnmatchcase(rel_path_lower, self.value)
+        return self.value in rel_path_lower
+
+    def key(self):
+        return (self.kind, self.value, self.negated)
+
+    def __repr__(self):
+        return f"Clause({self.kind!r}, {self.value!r}, negated={self.negated})"
+
+
+class Query:
+    """
+    A parsed search query.
+
+    Positive terms are scored by the ranker as in plain searches (any of them
+    may match). Everything else is a filter a file must pass: phrases,
+    path patterns and regexes must match (or must not, when negated), and
+    negated terms must not appear in the content nor in the path.
+    """
+
+    def __init__(self, clauses):
+        self.clauses = clauses
+
+    @property
+    def filters(self):
+        return [c for c in self.clauses if c.kind != TERM or c.negated]
+
+    @property
+    def has_filters(self):
+        return any(c.kind != TERM or c.negated for c in self.clauses)
+
+    @property
+    def score_tokens(self):
+        """Tokens for the ranker in query order: positive terms and the words of positive phrases."""
+        tokens = []
+        for clause in self.clauses:
+            if clause.negated:
+                continue
+            if clause.kind == TERM:
+                tokens.append(clause.value)
+            elif clause.kind == PHRASE:
+                tokens.extend(word for word in clause.value.split() if len(word) >= MIN_TERM_LENGTH)
+        return list(dict.fromkeys(tokens))
+
+    def key(self):
+        """Hashable normalized form (e.g. for result caches)."""
+        return tuple(c.key() for c in self.clauses)
+
+    def matches(self, rel_path, content):
+        """
+        True if a file passes every filter, evaluated straight from its path and
+        content (the reference for the index-backed evaluation in ProjectManager).
+        """
+        path_lower = rel_path.lower()
+        content_lower = None
+        for clause in self.filters:
+            if clause.kind == TERM:
+                if content_lower is None:
+                    content_lower = content.lower()
+                found = clause.value in path_lower or clause.value in content_lower
+            elif clause.kind == PATH:
+                found = clause.matches_path(path_lower)
+            else:
+                found = clause.pattern.search(content) is not None
+            if found == clause.negated:
+                return False
+        return True
+
+
+def parse_query(text):
+    """
+    Parses a search query.
+
+    Plain text, such as a prompt, is only a list of search terms: quotes
+    and '-' are not filters, so 'cambia el texto "Guardar cambios"' scores
+    every file with those words. Quoted words stay in order, so the
+    proximity stage still favours files where they appear together.
+
+    Text starting with QUERY_PREFIX uses the query syntax, see parse_query_syntax.
+    """
+    text = text or ""
+    stripped = text.lstrip()
+    if stripped.startswith(QUERY_PREFIX):
+        return parse_query_syntax(stripped[len(QUERY_PREFIX):])
+    clauses = []
+    seen = set()
+    for word in text.replace('"', ' ').lower().split():
+        if len(word) >= MIN_TERM_LENGTH and word not in seen:
+            seen.add(word)
+            clauses.append(Clause(TERM, word))
+    return Query(clauses)
+
+
+def parse_query_syntax(text):
+    """
+    Parses a search query in the query syntax. Besides plain words it understands:
+        "exact phrase"   the words, in this order, separated by any whitespace
+        -word            files containing word (in content or path) are left out
+        path:glob        rel_path matches the glob ('*.py', 'src/api/*'), or contains it if it has no glob characters
+        re:pattern       the content matches a regex (re:"with spaces" to quote it); ^ and $ match at
+                         the start and end of each line, not only of the file
+    Any clause can be negated with '-'. Plain and negated words shorter than
+    MIN_TERM_LENGTH are ignored, like empty clauses. Duplicates are dropped.
+
+    >>> query = parse_query_syntax(r're:^def\\s+_')
+    >>> query.matches('a.py', 'import os\\n\\ndef _helper():\\n    pass\\n')
+    True
+    >>> query.matches('b.py', 'import os\\n\\nundef _helper = 1\\n')
+    False
+    """
+    clauses = []
+    seen = set()
+    for match in CLAUSE_RE.finditer(text):
+        negated, prefix, quoted, bare = match.groups()
+        value = quoted if quoted is not None else bare
+        if prefix == 're':
+            clause = Clause(REGEX, value, bool(negated)) if value else None
+        elif prefix == 'path':
+            clause = Clause(PATH, value.lower(), bool(negated)) if value else None
+        elif quoted is not None:
+            phrase = " ".join(value.lower().split())
+            clause = Clause(PHRASE, phrase, bool(negated)) if phrase else None
+        else:
+            if negated and not value:
+                continue
+            word = value.lower()
+            clause = Clause(TERM, word, bool(negated)) if len(word) >= MIN_TERM_LENGTH else None
+        if clause is not None and clause.key() not in seen:
+            seen.add(clause.key())
+            clauses.append(clause)
+    return Query(clauses)
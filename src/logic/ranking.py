@@ -0,0 +1,253 @@
+import math
+from collections import OrderedDict
+from src.logic.search_worker import check_cancelled
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class _Ranker:
+    """
+    Base of the rankers. A query score is the sum of independent per-token
+    scores, which lets IncrementalScorer cache them per token.
+
+    Files that define a function, method or class named exactly like a query
+    token (see SearchIndex.symbol_matches) get SYMBOL_BOOST / df, df being
+    the number of files defining that name: a name defined once is strong
+    evidence, a common one ('get', 'run') barely moves the ranking.
+
+    PROXIMITY_BOOST and PHRASE_BOOST are the scale of the phrase/proximity
+    stage ProjectManager applies to the best candidates of multi-word queries.
+    """
+    name = None
+    SYMBOL_BOOST = 0
+    PROXIMITY_BOOST = 0
+    PHRASE_BOOST = 0
+
+    def _add_symbol_boost(self, scores, index, token, docs=None):
+        defining, df = index.symbol_matches(token, docs)
+        if defining:
+            boost = self.SYMBOL_BOOST / df
+            for doc_id in defining:
+                scores[doc_id] = scores.get(doc_id, 0) + boost
+        return scores
+
+    def token_scores(self, index, token, docs=None):
+        """
+        Returns {doc_id: score} of one query token for the docs of a SearchIndex,
+        only considering the doc_ids in docs if given (e.g. an extension filter).
+        """
+        raise NotImplementedError
+
+    def score(self, index, query_tokens, should_cancel=None, docs=None):
+        """
+        Returns {doc_id: score} for the docs matching any query token.
+        should_cancel is checked between tokens (raises SearchCancelled).
+        """
+        scores = {}
+        for token in query_tokens:
+            check_cancelled(should_cancel)
+            for doc_id, value in self.token_scores(index, token, docs).items():
+                scores[doc_id] = scores.get(doc_id, 0) + value
+        return scores
+
+
+class KeywordRanker(_Ranker):
+    """
+    The original heuristic: +10 per query token found in the path, +1 per
+    occurrence in the content (capped at 5 per token to avoid dominance by
+    large files).
+    """
+    name = 'keyword'
+    SYMBOL_BOOST = 5
+    PROXIMITY_BOOST = 5
+    PHRASE_BOOST = 10
+
+    def token_scores(self, index, token, docs=None):
+        scores = {doc_id: 10 for doc_id in index.path_matches(token, docs)}
+        for doc_id, count in index.content_counts(token, docs).items():
+            scores[doc_id] = scores.get(doc_id, 0) + min(count, 5)
+        return self._add_symbol_boost(scores, index, token, docs)
+
+
+class _TermWeightRanker(_Ranker):
+    """
+    Base of the rankers that score a doc as the sum over query tokens of
+    tf_weight(tf, doc length) x idf(df), plus a path bonus of PATH_WEIGHT x idf
+    when the token appears in the path. Term frequencies are the same
+    substring counts the keyword ranker uses.
+
+    Scoring is vectorized with NumPy when it is installed (a dense tf vector
+    built with bincount over the posting arrays), and falls back to plain
+    Python over the postings otherwise. When the docs are restricted the
+    collection statistics (doc count, df) are those of the restricted set.
+    """
+    PATH_WEIGHT = 2.0
+    SYMBOL_BOOST = 5.0
+    PROXIMITY_BOOST = 1.0
+    PHRASE_BOOST = 2.0
+
+    def idf(self, n_docs, df):
+        raise NotImplementedError
+
+    def tf_weights(self, tf, doc_lengths, avg_length):
+        """Vectorized weights (NumPy arrays in, array out); must be 0 where tf is 0."""
+        raise NotImplementedError
+
+    def tf_weight(self, tf, doc_length, avg_length):
+        """Scalar version of tf_weights for the pure Python path (tf > 0)."""
+        raise NotImplementedError
+
+    def token_scores(self, index, token, docs=None):
+        n_docs = index.doc_count if docs is None else len(docs)
+        if not n_docs:
+            return {}
+        if NUMPY_AVAILABLE:
+            scores = self._token_scores_numpy(index, token, docs, n_docs)
+        else:
+            scores = self._token_scores_python(index, token, docs, n_docs)
+        return self._add_symbol_boost(scores, index, token, docs)
+
+    def _token_scores_numpy(self, index, token, docs, n_docs):
+        size = index.doc_capacity
+        scores = np.zeros(size)
+
+        postings = [p for p in index.token_postings(token, docs) if len(p[0])]
+        path_docs = index.path_matches(token, docs)
+        if postings:
+            doc_ids = np.concatenate([np.frombuffer(ids, dtype=np.uintc) for ids, _, _ in postings])
+            counts = np.concatenate([
+                np.frombuffer(c, dtype=np.uintc).astype(np.float64) * m for _, c, m in postings
+            ])
+            tf = np.bincount(doc_ids, weights=counts, minlength=size)
+            doc_lengths = np.frombuffer(index.doc_lengths, dtype=np.uintc).astype(np.float64)
+            idf = self.idf(n_docs, int(np.count_nonzero(tf)))
+            scores += self.tf_weights(tf, doc_lengths, index.avg_doc_length or 1.0) * idf
+        else:
+            idf = self.idf(n_docs, len(path_docs))
+        if path_docs:
+            scores[np.fromiter(path_docs, dtype=np.intp, count=len(path_docs))] += self.PATH_WEIGHT * idf
+
+        matched = np.nonzero(scores)[0]
+        return dict(zip(matched.tolist(), scores[matched].tolist()))
+
+    def _token_scores_python(self, index, token, docs, n_docs):
+        doc_lengths = index.doc_lengths
+        avg_length = index.avg_doc_length or 1.0
+        tf = {}
+        for doc_ids, counts, multiplier in index.token_postings(token, docs):
+            for doc_id, count in zip(doc_ids, counts):
+                tf[doc_id] = tf.get(doc_id, 0) + count * multiplier
+        path_docs = index.path_matches(token, docs)
+        idf = self.idf(n_docs, len(tf) if tf else len(path_docs))
+        scores = {
+            doc_id: self.tf_weight(count, doc_lengths[doc_id], avg_length) * idf
+            for doc_id, count in tf.items()
+        }
+        for doc_id in path_docs:
+            scores[doc_id] = scores.get(doc_id, 0.0) + self.PATH_WEIGHT * idf
+        return scores
+
+
+class BM25Ranker(_TermWeightRanker):
+    """Okapi BM25: saturating term frequency, normalized by doc length."""
+    name = 'bm25'
+    K1 = 1.2
+    B = 0.75
+
+    def idf(self, n_docs, df):
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def tf_weights(self, tf, doc_lengths, avg_length):
+        norm = self.K1 * (1 - self.B + self.B * doc_lengths / avg_length)
+        return tf * (self.K1 + 1) / (tf + norm)
+
+    def tf_weight(self, tf, doc_length, avg_length):
+        norm = self.K1 * (1 - self.B + self.B * doc_length / avg_length)
+        return tf * (self.K1 + 1) / (tf + norm)
+
+
+class TfidfRanker(_TermWeightRanker):
+    """TF-IDF with sublinear term frequency (1 + ln tf) and smoothed idf."""
+    name = 'tfidf'
+
+    def idf(self, n_docs, df):
+        return math.log((n_docs + 1) / (df + 1)) + 1
+
+    def tf_weights(self, tf, doc_lengths, avg_length):
+        return np.where(tf > 0, 1 + np.log(np.maximum(tf, 1)), 0.0)
+
+    def tf_weight(self, tf, doc_length, avg_length):
+        return 1 + math.log(tf)
+
+
+RANKERS = {cls.name: cls for cls in (KeywordRanker, BM25Ranker, TfidfRanker)}
+
+DEFAULT_RANKER = KeywordRanker.name
+
+
+def get_ranker(name):
+    """Returns a ranker instance by name, falling back to the keyword ranker."""
+    return RANKERS.get(name, KeywordRanker)()
+
+
+class IncrementalScorer:
+    """
+    Scores queries as the user types, reusing work from previous queries.
+
+    Per-token partial scores are kept in an LRU while the index state (index
+    object, project generation, ranker and doc restriction) stays the same, so a query only
+    computes the postings of tokens not seen before. When the new query is
+    a superset of the previous one (the usual case: one more word typed),
+    the previous totals are the starting point and only the added tokens
+    are summed in. Scores are additive over tokens, so the candidate set is
+    the previous one plus the docs matching the new tokens.
+    """
+
+    def __init__(self, max_tokens=256):
+        self.max_tokens = max_tokens
+        self._state = None # (index, generation, ranker name) the cached scores belong to
+        self._partials = OrderedDict() # {token: {doc_id: score}}
+        self._last = None # (frozenset of tokens, {doc_id: score}) of the previous query
+
+    def score(self, ranker, index, generation, query_tokens, should_cancel=None, docs=None, scope=None):
+        """
+        Returns {doc_id: score}. The returned dict is shared, callers must not modify it.
+        docs optionally restricts the scored doc_ids; scope is a hashable key identifying
+        that restriction (e.g. the extension filter), part of the cache state.
+        """
+        state = (index, generation, ranker.name, scope)
+        if state != self._state:
+            self._state = state
+            self._partials.clear()
+            self._last = None
+
+        tokens = frozenset(query_tokens)
+        if self._last is not None and self._last[0] <= tokens:
+            scores = dict(self._last[1])
+            todo = tokens - self._last[0]
+        else:
+            scores = {}
+            todo = tokens
+
+        for token in todo:
+            check_cancelled(should_cancel)
+            for doc_id, value in self._token_scores(ranker, index, token, docs).items():
+                scores[doc_id] = scores.get(doc_id, 0) + value
+
+        self._last = (tokens, scores)
+        return scores
+
+    def _token_scores(self, ranker, index, token, docs):
+        partial = self._partials.get(token)
+        if partial is not None:
+            self._partials.move_to_end(token)
+            return partial
+        partial = ranker.token_scores(index, token, docs)
+        self._partials[token] = partial
+        while len(self._partials) > self.max_tokens:
+            self._partials.popitem(last=False)
+        return partial
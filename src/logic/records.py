@@ -0,0 +1,137 @@
+import os
+import sys
+
+
+class FileRecord:
+    """
+    Compact, slotted representation of a loaded project file.
+
+    Replaces the per-file dicts. The relative directory is interned so files
+    in the same folder share one string. Supports the dict-style access the
+    rest of the code uses (f['path'], f.get('skip'), 'rel_path' in f, ...).
+    The content is never stored here, use ProjectManager.get_file_content().
+    """
+    __slots__ = ('path', '_dir', 'name', 'size', 'mtime', 'skip')
+
+    KEYS = ('path', 'rel_path', 'size', 'mtime', 'skip')
+
+    def __init__(self, path, rel_path, size, mtime, skip=None):
+        rel_dir, name = os.path.split(rel_path)
+        self.path = path
+        self._dir = sys.intern(rel_dir)
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.skip = skip
+
+    @property
+    def rel_path(self):
+        return os.path.join(self._dir, self.name) if self._dir else self.name
+
+    # --- dict compatibility ---
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in ('size', 'mtime', 'skip'):
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        if key not in self.KEYS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        self[key] = None
+        return value
+
+    def keys(self):
+        return self.KEYS
+
+    def __repr__(self):
+        return f"FileRecord({self.rel_path!r}, size={self.size})"
+
+
+class SymbolRecord:
+    """
+    Compact, slotted representation of an extracted function.
+
+    Keeps character offsets into the file instead of a copy of the source;
+    'content' is sliced from the file on access and 'path' ("file:line") is
+    formatted on access. Supports the same dict-style access as the old
+    function dicts: name, type, content, file_rel_path, path.
+
+    first_line..end_line is the line span of the source (both 0-based and
+    inclusive, end_line None when unknown); decorators, if any, are the
+    lines from first_line up to line.
+
+    The offsets belong to the file as it was when the record was made, so
+    the file's (size, mtime) signature is kept too: once the file changes
+    the record is stale and 'content' is empty instead of a wrong slice.
+    """
+    __slots__ = ('name', 'type', 'file', 'line', 'start', 'end', '_store', 'first_line', 'end_line', '_signature')
+
+    KEYS = ('name', 'type', 'content', 'file_rel_path', 'path')
+
+    def __init__(self, name, file, line, start, end, store, symbol_type='function', first_line=None, end_line=None):
+        self.name = name
+        self.type = symbol_type
+        self.file = file
+        self.line = line # 0-based line of the definition
+        self.start = start # Offsets of the source in the file content
+        self.end = end
+        self._store = store
+        self.first_line = line if first_line is None else first_line
+        self.end_line = end_line
+        self._signature = (file['size'], file['mtime'])
+
+    @property
+    def is_stale(self):
+        """True if the file changed since the record was extracted."""
+        return (self.file['size'], self.file['mtime']) != self._signature
+
+    @property
+    def decorator_lines(self):
+        """(first, end) 0-based line range of the decorators, or None."""
+        return (self.first_line, self.line) if self.first_line < self.line else None
+
+    @property
+    def content(self):
+        if self.is_stale:
+            return ""
+        return self._store.get(self.file['path'])[self.start:self.end]
+
+    @property
+    def file_rel_path(self):
+        return self.file['rel_path']
+
+    @property
+    def path(self):
+        return f"{self.file['path']}:{self.line + 1}"
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        if key not in self.KEYS:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return self.KEYS
+
+    def __repr__(self):
+        return f"SymbolRecord({self.name!r}, {self.path!r})"
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+import zlib
+
+
+class ScanCache:
+    """
+    Persistent per-project cache of scan results.
+
+    Stores, for every code file, the stat signature (size, mtime) seen on the
+    last scan together with a content hash and the small data derived from
+    the content. On the next load only files whose signature changed need to
+    be read again. Caches live in the 'cache' directory, one JSON file per
+    project, next to a binary image of the project's search index (an
+    '.index' file, see SearchIndex.dump) so unchanged files are not
+    tokenized again. Both files carry the same random id: an image is only
+    used with the JSON it was written with.
+
+    Entry format (keyed by relative path):
+        {"size": int, "mtime": int (ns), "hash": str | None, "derived": {...},
+         "skip": reason (metadata-only files), "override": True (forced full ingest)}
+    """
+    CACHE_DIR = "cache"
+    VERSION = 6
+    # zlib level of the index image: the fastest, it still shrinks the image about 3x
+    INDEX_COMPRESSION = 1
+    # Seconds save_later waits so a burst of changes is written once
+    SAVE_DELAY = 2.0
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+        cache_root = os.path.join(os.getcwd(), self.CACHE_DIR)
+        digest = hashlib.sha1(project_path.encode('utf-8')).hexdigest()[:12]
+        name = os.path.basename(os.path.normpath(project_path)) or "root"
+        self.cache_path = os.path.join(cache_root, f"{name}-{digest}.json")
+        self.index_path = os.path.join(cache_root, f"{name}-{digest}.index")
+        self._index_id = None # Id of the index image that goes with the last loaded entries
+        self._pending = None
+        self._timer = None
+        self._save_lock = threading.Lock()
+
+    def load(self):
+        """Returns the cached entries, or an empty dict if there is no usable cache."""
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"ScanCache: Error loading cache {self.cache_path}: {e}")
+            return {}
+        if data.get("version") != self.VERSION or data.get("project") != self.project_path:
+            return {}
+        self._index_id = data.get("index")
+        return data.get("files", {})
+
+    def load_index(self):
+        """Returns the search index image (bytes) saved with the entries last returned by load(), or None."""
+        if not self._index_id:
+            return None
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        header = self._index_id.encode('ascii')
+        if not data.startswith(header):
+            return None # Written with other entries (e.g. interrupted save)
+        try:
+            return zlib.decompress(data[len(header):])
+        except zlib.error as e:
+            print(f"ScanCache: Error loading index {self.index_path}: {e}")
+            return None
+
+    def save(self, entries, index_data=None):
+        """
+        Writes the entries (and the search index image, if given) to disk,
+        replacing the previous cache atomically.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            # Unique temp names: a background pre-warm may save the same project concurrently
+            suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+            index_id = None
+            if index_data is not None:
+                index_id = uuid.uuid4().hex
+                tmp_path = f"{self.index_path}.{suffix}"
+                with open(tmp_path, 'wb') as f:
+                    f.write(index_id.encode('ascii'))
+                    f.write(zlib.compress(index_data, self.INDEX_COMPRESSION))
+                os.replace(tmp_path, self.index_path)
+            tmp_path = f"{self.cache_path}.{suffix}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": self.VERSION,
+                    "project": self.project_path,
+                    "index": index_id,
+                    "files": entries
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"ScanCache: Error saving cache {self.cache_path}: {e}")
+
+    def save_later(self, snapshot, delay=None):
+        """
+        Schedules a save after delay seconds on a timer thread. snapshot is a
+        callable returning the save() arguments (entries, index_data); it is
+        called when the save runs, so saves requested meanwhile are coalesced
+        into one snapshot of the latest state.
+        """
+        with self._save_lock:
+            self._pending = snapshot
+            if self._timer is None:
+                self._timer = threading.Timer(self.SAVE_DELAY if delay is None else delay, self.flush)
+                self._timer.start()
+
+    def flush(self):
+        """Writes a pending save_later now, if any."""
+        with self._save_lock:
+            snapshot, self._pending = self._pending, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if snapshot is not None:
+            self.save(*snapshot())
+
+    @staticmethod
+    def is_fresh(entry, size, mtime):
+        """True if a cached entry still matches the file's current stat signature."""
+        return entry is not None and entry.get("size") == size and entry.get("mtime") == mtime
+
+    @staticmethod
+    def hash_bytes(data):
+        return hashlib.sha1(data).hexdigest()
@@ -0,0 +1,812 @@
+import os
+import re
+import heapq
+import struct
+from collections import OrderedDict
+from itertools import accumulate
+from array import array
+from src.logic.symbol_index import SymbolIndex
+
+# Terms of the index: maximal runs of word characters of the lowercased text
+TOKEN_RE = re.compile(r'\w+')
+
+
+# Length of the n-grams used to find vocabulary terms containing a fragment
+GRAM_SIZE = 3
+
+# A query token that may name a symbol: an optionally qualified name between any punctuation
+SYMBOL_TOKEN_RE = re.compile(r'\W*(\w+(?:\.\w+)*)\W*')
+
+
+def tokenize(text):
+    """Returns {term: occurrences} for already lowercased text."""
+    counts = {}
+    for term in TOKEN_RE.findall(text):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def ngrams(text):
+    """Set of the GRAM_SIZE-grams of text."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class NgramIndex:
+    """
+    Trigram index over a vocabulary of a SearchIndex, in the style of Google
+    Code Search: the strings containing a fragment are found by taking the
+    rarest of the fragment's trigrams and verifying the strings it lists,
+    instead of testing every string.
+
+    The vocabulary is a list of strings by id, shared with the owner: ids
+    are never reused and a dropped string becomes None, so each trigram
+    maps to an array('I') of ascending ids that only grows; ids of dropped
+    strings are skipped when verifying.
+    """
+
+    def __init__(self, strings, grams=None):
+        self._strings = strings # id -> string (None once dropped)
+        self._grams = {} if grams is None else grams # {gram: array('I') of ids}
+        if grams is None:
+            for string_id, s in enumerate(strings):
+                if s is not None:
+                    self.add(string_id)
+
+    def add(self, string_id):
+        """Indexes the string with this id (the highest id so far)."""
+        grams = self._grams
+        for gram in ngrams(self._strings[string_id]):
+            ids = grams.get(gram)
+            if ids is None:
+                ids = grams[gram] = array('I')
+            ids.append(string_id)
+
+    @property
+    def grams(self):
+        return self._grams
+
+    def containing(self, fragment):
+        """Strings that contain fragment (len(fragment) >= GRAM_SIZE)."""
+        smallest = None
+        for gram in ngrams(fragment):
+            ids = self._grams.get(gram)
+            if ids is None:
+                return []
+            if smallest is None or len(ids) < len(smallest):
+                smallest = ids
+        return [s for s in map(self._strings.__getitem__, smallest) if s is not None and fragment in s]
+
+
+# Postings of a term no doc has anymore (term ids are not reused, so it is never mutated)
+_NO_PAIRS = array('I')
+
+
+def _pair_index(pairs, doc_id):
+    """
+    Offset in pairs (an array of (doc_id, count) pairs sorted by doc_id) of
+    the pair of doc_id, or of where it would be inserted.
+    """
+    lo, hi = 0, len(pairs) // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if pairs[2 * mid] < doc_id:
+            lo = mid + 1
+        else:
+            hi = mid
+    return 2 * lo
+
+
+def encode_positions(positions):
+    """Delta-encodes ascending positions into an array('I')."""
+    deltas = array('I')
+    previous = 0
+    for pos in positions:
+        deltas.append(pos - previous)
+        previous = pos
+    return deltas
+
+
+def decode_positions(deltas):
+    return list(accumulate(deltas))
+
+
+def min_span(position_lists):
+    """
+    Smallest window (last - first position) containing one position of every
+    list (each sorted ascending). Returns None if a list is empty.
+    """
+    if not all(position_lists):
+        return None
+    heap = [(positions[0], i, 0) for i, positions in enumerate(position_lists)]
+    heapq.heapify(heap)
+    current_max = max(positions[0] for positions in position_lists)
+    best = current_max - heap[0][0]
+    while True:
+        pos, i, j = heapq.heappop(heap)
+        best = min(best, current_max - pos)
+        if j + 1 == len(position_lists[i]):
+            return best
+        next_pos = position_lists[i][j + 1]
+        current_max = max(current_max, next_pos)
+        heapq.heappush(heap, (next_pos, i, j + 1))
+
+
+def has_phrase(position_lists, lengths, max_gap=2):
+    """
+    True if the lists hold character offsets of consecutive words in list
+    order: each one starting at most max_gap characters after the end of the
+    previous one (lengths are the words' lengths).
+    """
+    if not all(position_lists):
+        return False
+    following = [set(positions) for positions in position_lists[1:]]
+    for start in position_lists[0]:
+        ends = [start + lengths[0]]
+        for length, positions in zip(lengths[1:], following):
+            ends = [
+                end + gap + length for end in ends for gap in range(max_gap + 1)
+                if end + gap in positions
+            ]
+            if not ends:
+                break
+        else:
+            return True
+    return False
+
+
+def _is_part_boundary(text, lower, i):
+    """True if a word or identifier part may start at offset i (0 < i < len): after a non-alphanumeric or at a camelCase hump."""
+    return not (lower[i - 1].isalnum() and lower[i].isalnum()) or (text[i].isupper() and text[i - 1].islower())
+
+
+def find_word(text, lower, word, limit, max_scan):
+    """
+    Ascending offsets of the lowercased word in lower (text lowercased) where
+    it is a whole word or identifier part ('load' in 'load_project' and in
+    'loadProject', not in 'loader'). Stops after limit offsets or max_scan occurrences.
+    """
+    offsets = []
+    size = len(lower)
+    n = len(word)
+    i = lower.find(word)
+    scanned = 0
+    while i >= 0 and len(offsets) < limit and scanned < max_scan:
+        j = i + n
+        if (i == 0 or _is_part_boundary(text, lower, i)) and (j == size or _is_part_boundary(text, lower, j)):
+            offsets.append(i)
+        scanned += 1
+        i = lower.find(word, j)
+    return offsets
+
+
+class PositionalIndex:
+    """
+    Lazy positional index: for each doc, the character offsets of the words
+    a phrase/proximity stage asked about ({word: delta-encoded array('I')}),
+    kept in an LRU bounded by byte_budget.
+
+    Offsets are found with str.find over the lowercased content, only where
+    the word is a whole word or identifier part (see find_word); nothing is
+    tokenized. Only the first MAX_CHARS characters are searched and at most
+    MAX_WORD_POSITIONS offsets are kept per word: proximity is a ranking
+    hint, and huge files or common words would otherwise dominate its cost.
+    """
+
+    MAX_CHARS = 64 * 1024
+    MAX_WORD_POSITIONS = 64
+    # Occurrences looked at per word ('get' inside 'target' is not kept, but costs a look)
+    MAX_WORD_SCAN = 1024
+
+    def __init__(self, content_getter, byte_budget=32 * 1024 * 1024):
+        self._get_content = content_getter # Callable(abs_path) -> text
+        self.byte_budget = byte_budget
+        self._entries = OrderedDict() # {doc_id: [{word: array('I')}, estimated bytes]}
+        self._used_bytes = 0
+
+    def get(self, doc_id, path, words):
+        """Returns, for each lowercased word of words, the ascending offsets of it in the doc."""
+        entry = self._entries.get(doc_id)
+        if entry is None:
+            entry = self._entries[doc_id] = [{}, 0]
+        else:
+            self._entries.move_to_end(doc_id)
+        positions = entry[0]
+        missing = [word for word in words if word not in positions]
+        if missing:
+            text = self._get_content(path)[:self.MAX_CHARS]
+            lower = text.lower()
+            if len(lower) != len(text):
+                text = lower # Lowercasing moved offsets: no camelCase humps
+            for word in missing:
+                offsets = find_word(text, lower, word, self.MAX_WORD_POSITIONS, self.MAX_WORD_SCAN)
+                positions[word] = encode_positions(offsets)
+                size = positions[word].itemsize * len(offsets) + 120
+                entry[1] += size
+                self._used_bytes += size
+            while self._used_bytes > self.byte_budget and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._used_bytes -= evicted
+        return [decode_positions(positions[word]) for word in words]
+
+    @property
+    def used_bytes(self):
+        return self._used_bytes
+
+    def discard(self, doc_id):
+        entry = self._entries.pop(doc_id, None)
+        if entry is not None:
+            self._used_bytes -= entry[1]
+
+
+class IndexImage:
+    """
+    The content postings of a SearchIndex as saved by SearchIndex.dump: flat
+    arrays over docs identified by relative path ('' for an empty slot) and
+    terms ('' for a dropped term), plus the trigram index of the terms.
+    """
+    __slots__ = (
+        'paths', 'doc_lengths', 'terms', 'term_offsets', 'pairs', 'doc_term_offsets', 'doc_terms',
+        'grams', 'gram_offsets', 'gram_ids'
+    )
+
+    MAGIC = b'PGIX'
+    VERSION = 2
+    # Magic, version, array item size, then the byte length of each section
+    HEADER = struct.Struct('<4sII10Q')
+
+    def __init__(self, paths, doc_lengths, terms, term_offsets, pairs, doc_term_offsets, doc_terms,
+                 grams, gram_offsets, gram_ids):
+        self.paths = paths # doc_id -> rel_path
+        self.doc_lengths = doc_lengths # array('I'), doc_id -> number of terms
+        self.terms = terms # term_id -> term
+        self.term_offsets = term_offsets # array('I'), term_id -> start of its pairs (items), plus the end
+        self.pairs = pairs # array('I'), (doc_id, count) pairs of every term, in term order
+        self.doc_term_offsets = doc_term_offsets # array('I'), doc_id -> start of its term ids, plus the end
+        self.doc_terms = doc_terms # array('I'), term ids of every doc, in doc order
+        self.grams = grams # gram_id -> trigram
+        self.gram_offsets = gram_offsets # array('I'), gram_id -> start of its term ids, plus the end
+        self.gram_ids = gram_ids # array('I'), ascending term ids of every gram, in gram order
+
+    def to_bytes(self):
+        sections = [
+            '\0'.join(self.paths).encode('utf-8'), '\n'.join(self.terms).encode('utf-8'),
+            '\n'.join(self.grams).encode('utf-8'),
+            self.doc_lengths.tobytes(), self.term_offsets.tobytes(), self.pairs.tobytes(),
+            self.doc_term_offsets.tobytes(), self.doc_terms.tobytes(),
+            self.gram_offsets.tobytes(), self.gram_ids.tobytes()
+        ]
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, array('I').itemsize, *(len(b) for b in sections))
+        return b''.join([header] + sections)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Parses to_bytes output. Returns None if data is not a usable image."""
+        try:
+            magic, version, itemsize, *lengths = cls.HEADER.unpack_from(data)
+        except struct.error:
+            return None
+        if magic != cls.MAGIC or version != cls.VERSION or itemsize != array('I').itemsize:
+            return None
+        if cls.HEADER.size + sum(lengths) != len(data):
+            return None
+        view = memoryview(data)
+        sections = []
+        offset = cls.HEADER.size
+        for length in lengths:
+            sections.append(view[offset:offset + length])
+            offset += length
+        arrays = []
+        for section in sections[3:]:
+            values = array('I')
+            values.frombytes(section)
+            arrays.append(values)
+        doc_lengths, term_offsets, pairs, doc_term_offsets, doc_terms, gram_offsets, gram_ids = arrays
+        # Joined with separators, so no docs and one empty slot both serialize to b''
+        paths = str(sections[0], 'utf-8').split('\0') if doc_lengths else []
+        terms = str(sections[1], 'utf-8').split('\n') if len(term_offsets) > 1 else []
+        grams = str(sections[2], 'utf-8').split('\n') if len(gram_offsets) > 1 else []
+        if len(paths) != len(doc_lengths) or len(term_offsets) != len(terms) + 1 or len(doc_term_offsets) != len(paths) + 1:
+            return None
+        if len(gram_offsets) != len(grams) + 1:
+            return None
+        return cls(paths, doc_lengths, terms, term_offsets, pairs, doc_term_offsets, doc_terms, grams, gram_offsets, gram_ids)
+
+
+class SearchIndex:
+    """
+    Inverted index over the content and paths of the loaded files.
+
+    Every content term gets an integer id; its postings are one array('I')
+    of (doc_id, occurrences) pairs sorted by doc_id, and each doc keeps the
+    array of its term ids (to unindex it), so the index costs a few bytes
+    per posting instead of a dict entry. A separate path index maps the
+    terms of each lowercased relative path to the docs whose path contains
+    them.
+
+    The content postings are saved with the scan cache (dump) and restored
+    from it as flat arrays (restore): a term's postings stay a slice of the
+    restored arrays until a doc with that term is added or removed, so a
+    warm load neither re-reads nor re-tokenizes unchanged files and does
+    not rebuild their postings.
+
+    A query token made of word characters only can never match across a
+    term boundary, so its exact substring count in a file is the sum, over
+    the vocabulary terms containing it, of postings count x term.count(token).
+    The vocabulary terms containing a fragment are found with trigram indexes
+    over the content and path vocabularies, kept up to date as terms are
+    added (and saved with the content postings), so no query pays for
+    building them. Other tokens (e.g. 'self.files') are
+    narrowed with their word runs and verified against the content (or path)
+    of the remaining candidates.
+
+    Term positions are not stored up front: PositionalIndex builds them per
+    doc on demand for phrase and proximity scoring of the top candidates.
+
+    The names of the symbols each file defines are kept in a SymbolIndex
+    so rankers can boost defining files.
+
+    Docs are also partitioned by file extension, so an extension filter
+    turns into a doc set before scoring; every lookup below accepts such a
+    set (docs) and then only does work proportional to it.
+
+    For vectorized rankers the postings of a term are also exposed as a pair
+    of parallel arrays (doc ids, counts), built lazily and dropped whenever a
+    doc with that term is added or removed; together they form a sparse
+    term-frequency matrix.
+
+    Not thread-safe: ProjectManager only touches it while holding its lock.
+    """
+
+    # Rough memory cost of one vocabulary term (string, dict entry, postings array header)
+    BYTES_PER_TERM = 160
+    # dump() leaves out empty doc and term slots once they are more than this fraction of all slots
+    COMPACT_FRACTION = 0.25
+
+    def __init__(self, content_getter):
+        self._get_content = content_getter # Callable(abs_path) -> text
+        self._term_ids = {} # {term: term_id}
+        self._terms = [] # term_id -> term (None once no doc has it; ids are not reused)
+        # term_id -> array('I') of (doc_id, count) pairs sorted by doc_id, or None while they are
+        # still the term's slice of _base_pairs (restored from the scan cache)
+        self._postings = []
+        self._base_pairs = array('I')
+        self._base_offsets = array('I') # term_id -> start of its pairs in _base_pairs, plus the end
+        self._path_postings = {} # {path term: set(doc_id)}
+        self._path_term_ids = {} # {path term: id}, for _path_grams
+        self._path_terms = [] # id -> path term (None once no path has it; ids are not reused)
+        self._docs = [] # doc_id -> FileRecord (None once removed)
+        self._doc_terms = [] # doc_id -> (array('I') of term ids, (path terms))
+        self._doc_paths = [] # doc_id -> lowercased rel_path
+        self._doc_ids = {} # {abs_path: doc_id}
+        self._doc_lengths = array('I') # doc_id -> number of terms in the content
+        self._total_length = 0
+        self._term_arrays = {} # {term_id: (array of doc_ids, array of counts)}, built lazily
+        self._content_grams = NgramIndex(self._terms) # Kept up to date as terms are added
+        self._ext_docs = {} # {extension: set(doc_id)}
+        self.symbols = SymbolIndex()
+        self.positions = PositionalIndex(content_getter)
+        self._path_grams = NgramIndex(self._path_terms)
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def doc_id(self, path):
+        return self._doc_ids.get(path)
+
+    def doc(self, doc_id):
+        return self._docs[doc_id]
+
+    @property
+    def doc_count(self):
+        """Number of indexed docs."""
+        return len(self._doc_ids)
+
+    @property
+    def doc_capacity(self):
+        """Upper bound of doc ids (removed docs keep their id, with length 0)."""
+        return len(self._docs)
+
+    @property
+    def doc_lengths(self):
+        return self._doc_lengths
+
+    @property
+    def avg_doc_length(self):
+        return self._total_length / len(self._doc_ids) if self._doc_ids else 0.0
+
+    def add(self, record, tokens, symbols=()):
+        """
+        Indexes a file. tokens is {term: count} of its lowercased content,
+        symbols the names of the functions, methods and classes it defines.
+        A file that is already indexed keeps its doc id, so doc ids stay in
+        load order (which search results use to break score ties).
+        """
+        doc_id = self._doc_ids.get(record['path'])
+        if doc_id is not None:
+            self._unindex(doc_id)
+        else:
+            doc_id = len(self._docs)
+            self._docs.append(None)
+            self._doc_terms.append(None)
+            self._doc_paths.append(None)
+            self._doc_lengths.append(0)
+
+        term_ids = array('I')
+        self._add_doc(doc_id, record, term_ids, symbols)
+        length = sum(tokens.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+        for term, count in tokens.items():
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                term_id = self._term_ids[term] = len(self._terms)
+                self._terms.append(term)
+                self._postings.append(array('I'))
+                self._content_grams.add(term_id)
+            else:
+                self._term_arrays.pop(term_id, None)
+            term_ids.append(term_id)
+            pairs = self._own_pairs(term_id)
+            if not pairs or pairs[-2] < doc_id:
+                pairs.append(doc_id)
+                pairs.append(count)
+            else:
+                i = _pair_index(pairs, doc_id)
+                pairs[i:i] = array('I', (doc_id, count))
+
+    def _add_doc(self, doc_id, record, term_ids, symbols):
+        """Fills the slot of a doc: its record, path terms, extension partition and symbols."""
+        path_lower = record['rel_path'].lower()
+        path_terms = tuple(tokenize(path_lower))
+        self._docs[doc_id] = record
+        self._doc_ids[record['path']] = doc_id
+        self._doc_terms[doc_id] = (term_ids, path_terms)
+        self._doc_paths[doc_id] = path_lower
+        self._ext_docs.setdefault(os.path.splitext(path_lower)[1], set()).add(doc_id)
+        for term in path_terms:
+            docs = self._path_postings.get(term)
+            if docs is None:
+                docs = self._path_postings[term] = set()
+                term_id = self._path_term_ids[term] = len(self._path_terms)
+                self._path_terms.append(term)
+                self._path_grams.add(term_id)
+            docs.add(doc_id)
+        self.symbols.add(doc_id, symbols)
+
+    def remove(self, path):
+        """Drops a file from the index (no-op if it is not indexed)."""
+        doc_id = self._doc_ids.pop(path, None)
+        if doc_id is not None:
+            self._unindex(doc_id)
+
+    def _unindex(self, doc_id):
+        """Removes the postings of a doc and empties its slot."""
+        term_ids, path_terms = self._doc_terms[doc_id]
+        self._remove_postings(doc_id, term_ids)
+        for term in path_terms:
+            docs = self._path_postings.get(term)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self._path_postings[term]
+                    self._path_terms[self._path_term_ids.pop(term)] = None
+        self.symbols.remove(doc_id)
+        self.positions.discard(doc_id)
+        ext = os.path.splitext(self._doc_paths[doc_id])[1]
+        ext_docs = self._ext_docs.get(ext)
+        if ext_docs is not None:
+            ext_docs.discard(doc_id)
+            if not ext_docs:
+                del self._ext_docs[ext]
+        self._docs[doc_id] = None
+        self._doc_terms[doc_id] = None
+        self._doc_paths[doc_id] = None
+        self._total_length -= self._doc_lengths[doc_id]
+        self._doc_lengths[doc_id] = 0
+
+    def _remove_postings(self, doc_id, term_ids):
+        """Removes the (doc_id, count) pair from the postings of each term; drops terms left without docs."""
+        for term_id in term_ids:
+            self._term_arrays.pop(term_id, None)
+            pairs = self._own_pairs(term_id)
+            i = _pair_index(pairs, doc_id)
+            del pairs[i:i + 2]
+            if not pairs:
+                term = self._terms[term_id]
+                del self._term_ids[term]
+                self._terms[term_id] = None
+                self._postings[term_id] = _NO_PAIRS
+
+    def _pairs(self, term_id):
+        """The (doc_id, count) pairs of a term (do not modify: may be a fresh slice of _base_pairs)."""
+        pairs = self._postings[term_id]
+        if pairs is None:
+            base_offsets = self._base_offsets
+            pairs = self._base_pairs[base_offsets[term_id]:base_offsets[term_id + 1]]
+        return pairs
+
+    def _own_pairs(self, term_id):
+        """The pairs array of a term, copied out of _base_pairs first so it can be modified."""
+        pairs = self._postings[term_id]
+        if pairs is None:
+            pairs = self._postings[term_id] = self._pairs(term_id)
+        return pairs
+
+    def dump(self):
+        """
+        Serializes the content postings, docs identified by rel_path, for the
+        scan cache (see restore). Empty slots of removed docs and dropped terms
+        are kept while few, so a dump after small changes is a plain copy.
+        """
+        n_docs, n_terms = len(self._docs), len(self._terms)
+        live_docs = [doc_id for doc_id, record in enumerate(self._docs) if record is not None]
+        live_terms = [term_id for term_id, term in enumerate(self._terms) if term is not None]
+        compact_docs = n_docs - len(live_docs) > n_docs * self.COMPACT_FRACTION
+        compact_terms = n_terms - len(live_terms) > n_terms * self.COMPACT_FRACTION
+        doc_order = live_docs if compact_docs else range(n_docs)
+        term_order = live_terms if compact_terms else range(n_terms)
+        doc_map = {doc_id: i for i, doc_id in enumerate(live_docs)} if compact_docs else None
+        term_map = {term_id: i for i, term_id in enumerate(live_terms)} if compact_terms else None
+
+        term_pairs = []
+        for term_id in term_order:
+            pairs = self._pairs(term_id)
+            if doc_map is not None and pairs:
+                pairs = array('I', pairs)
+                pairs[0::2] = array('I', [doc_map[doc_id] for doc_id in pairs[0::2]])
+            term_pairs.append(pairs)
+        doc_terms = []
+        for doc_id in doc_order:
+            terms = self._doc_terms[doc_id]
+            term_ids = terms[0] if terms is not None else _NO_PAIRS
+            if term_map is not None:
+                term_ids = array('I', [term_map[term_id] for term_id in term_ids])
+            doc_terms.append(term_ids)
+
+        pairs = array('I')
+        for chunk in term_pairs:
+            pairs.extend(chunk)
+        all_doc_terms = array('I')
+        for chunk in doc_terms:
+            all_doc_terms.extend(chunk)
+        grams, gram_chunks = [], []
+        for gram, ids in self._content_grams.grams.items():
+            if term_map is not None:
+                ids = array('I', [term_map[term_id] for term_id in ids if term_id in term_map])
+                if not ids:
+                    continue
+            grams.append(gram)
+            gram_chunks.append(ids)
+        gram_ids = array('I')
+        for chunk in gram_chunks:
+            gram_ids.extend(chunk)
+        return IndexImage(
+            [self._docs[doc_id]['rel_path'] if self._docs[doc_id] is not None else '' for doc_id in doc_order],
+            array('I', [self._doc_lengths[doc_id] for doc_id in doc_order]),
+            [self._terms[term_id] or '' for term_id in term_order],
+            array('I', accumulate((len(chunk) for chunk in term_pairs), initial=0)),
+            pairs,
+            array('I', accumulate((len(chunk) for chunk in doc_terms), initial=0)),
+            all_doc_terms,
+            grams,
+            array('I', accumulate((len(chunk) for chunk in gram_chunks), initial=0)),
+            gram_ids
+        ).to_bytes()
+
+    def restore(self, image, records):
+        """
+        Loads an IndexImage into this empty index. records maps rel_path to
+        (FileRecord, symbol names) for the files whose saved postings are still
+        valid; the other docs of the image are dropped. Files re-read since can
+        then be add()ed on top (they keep their doc id if the image had them).
+        """
+        terms = image.terms
+        self._terms = terms
+        self._term_ids = dict(zip(terms, range(len(terms))))
+        self._postings = [None] * len(terms)
+        self._base_pairs = image.pairs
+        self._base_offsets = image.term_offsets
+        if '' in self._term_ids:
+            del self._term_ids['']
+            for term_id, term in enumerate(terms):
+                if not term:
+                    terms[term_id] = None
+                    self._postings[term_id] = _NO_PAIRS
+        offsets, gram_ids = image.gram_offsets, image.gram_ids
+        self._content_grams = NgramIndex(terms, {
+            gram: gram_ids[offsets[gram_id]:offsets[gram_id + 1]] for gram_id, gram in enumerate(image.grams)
+        })
+
+        n_docs = len(image.paths)
+        self._docs = [None] * n_docs
+        self._doc_terms = [None] * n_docs
+        self._doc_paths = [None] * n_docs
+        self._doc_lengths = image.doc_lengths
+        offsets, all_doc_terms = image.doc_term_offsets, image.doc_terms
+        dropped = []
+        for doc_id, rel_path in enumerate(image.paths):
+            term_ids = all_doc_terms[offsets[doc_id]:offsets[doc_id + 1]]
+            entry = records.get(rel_path) if rel_path else None
+            if entry is None:
+                dropped.append((doc_id, term_ids))
+                self._doc_lengths[doc_id] = 0
+                continue
+            record, symbols = entry
+            self._add_doc(doc_id, record, term_ids, symbols)
+        self._total_length = sum(self._doc_lengths)
+        for doc_id, term_ids in dropped:
+            self._remove_postings(doc_id, term_ids)
+
+    def doc_ids(self):
+        """Set of the ids of the indexed docs."""
+        return set(self._doc_ids.values())
+
+    def docs_with_suffixes(self, suffixes):
+        """
+        Returns the set of doc_ids whose lowercased rel_path ends with one of the
+        lowercase suffixes ('.py', '.test.js', ...), from the extension partitions.
+        """
+        docs = set()
+        for suffix in suffixes:
+            ext = os.path.splitext('x' + suffix)[1]
+            partition = self._ext_docs.get(ext, ())
+            if ext == suffix:
+                docs.update(partition)
+            else:
+                # Multi-dot suffix: narrow by its last extension, then verify
+                docs.update(d for d in partition if self._doc_paths[d].endswith(suffix))
+        return docs
+
+    def content_counts(self, token, docs=None):
+        """
+        Returns {doc_id: non-overlapping occurrences of token in the lowercased content},
+        restricted to the doc_ids in docs if given.
+        """
+        if TOKEN_RE.fullmatch(token):
+            counts = {}
+            for term in self._terms_containing(token):
+                multiplier = term.count(token)
+                for doc_id, count in self._restrict(self._term_pairs(term), docs):
+                    counts[doc_id] = counts.get(doc_id, 0) + count * multiplier
+            return counts
+
+        candidates = self._candidates(token)
+        if docs is not None:
+            candidates &= docs
+        counts = {}
+        for doc_id in candidates:
+            count = self._get_content(self._docs[doc_id]['path']).lower().count(token)
+            if count:
+                counts[doc_id] = count
+        return counts
+
+    def _term_pairs(self, term):
+        """The (doc_id, count) pairs array of a content term."""
+        return self._pairs(self._term_ids[term])
+
+    @staticmethod
+    def _restrict(pairs, docs):
+        """(doc_id, count) items of a pairs array, searching whichever of pairs/docs is smaller."""
+        if docs is None:
+            return zip(pairs[0::2], pairs[1::2])
+        if len(docs) < len(pairs) // 2:
+            items = []
+            for d in docs:
+                i = _pair_index(pairs, d)
+                if i < len(pairs) and pairs[i] == d:
+                    items.append((d, pairs[i + 1]))
+            return items
+        return [(d, c) for d, c in zip(pairs[0::2], pairs[1::2]) if d in docs]
+
+    def token_postings(self, token, docs=None):
+        """
+        Returns [(doc_ids, counts, multiplier)] (arrays) such that the content
+        count of token in a doc is the sum of counts x multiplier over its entries.
+        """
+        if TOKEN_RE.fullmatch(token):
+            if docs is None:
+                return [
+                    self._get_term_arrays(term) + (term.count(token),)
+                    for term in self._terms_containing(token)
+                ]
+            entries = []
+            for term in self._terms_containing(token):
+                items = self._restrict(self._term_pairs(term), docs)
+                if items:
+                    entries.append((
+                        array('I', [d for d, _ in items]), array('I', [c for _, c in items]), term.count(token)
+                    ))
+            return entries
+        counts = self.content_counts(token, docs)
+        return [(array('I', counts.keys()), array('I', counts.values()), 1)]
+
+    def _get_term_arrays(self, term):
+        term_id = self._term_ids[term]
+        arrays = self._term_arrays.get(term_id)
+        if arrays is None:
+            pairs = self._pairs(term_id)
+            arrays = self._term_arrays[term_id] = (pairs[0::2], pairs[1::2])
+        return arrays
+
+    def path_matches(self, token, docs=None):
+        """Returns the set of doc_ids whose lowercased rel_path contains token (restricted to docs if given)."""
+        if TOKEN_RE.fullmatch(token):
+            matches = set()
+            for term in self._terms_containing(token, path=True):
+                matches.update(self._path_postings[term])
+            return matches & docs if docs is not None else matches
+        candidates = self._candidates(token, path=True)
+        if docs is not None:
+            candidates &= docs
+        return {doc_id for doc_id in candidates if token in self._doc_paths[doc_id]}
+
+    def token_positions(self, doc_id, tokens):
+        """
+        For each query token (lowercased, word characters only), the ascending
+        character offsets in a doc's content where it is a whole word or
+        identifier part (see PositionalIndex).
+        """
+        return self.positions.get(doc_id, self._docs[doc_id]['path'], tokens)
+
+    def symbol_matches(self, token, docs=None):
+        """
+        Returns (docs defining it, df) for a query token that names a symbol as
+        a whole, ignoring surrounding punctuation ('load_project(' names
+        load_project). For a qualified name ('ProjectManager.load_project')
+        the docs must also define each owner that some file of the project
+        defines, so variables ('pm.load_project') do not count as owners.
+        df is the number of defining docs in the whole index (for rarity);
+        the returned docs are restricted to docs if given.
+        """
+        match = SYMBOL_TOKEN_RE.fullmatch(token)
+        if match is None:
+            return set(), 0
+        name = match.group(1)
+        defining = self.symbols.defining(name)
+        if not defining and '.' in name:
+            *owners, name = name.split('.')
+            defining = self.symbols.defining(name)
+            for owner in owners:
+                owner_docs = self.symbols.defining(owner)
+                if owner_docs:
+                    defining = defining & owner_docs
+        df = len(defining)
+        return (defining & docs if docs is not None else defining), df
+
+    def _terms_containing(self, token, path=False):
+        """Vocabulary terms (of the content, or of the paths) that contain token as a substring."""
+        vocabulary = self._path_postings if path else self._term_ids
+        if len(token) < GRAM_SIZE:
+            return [term for term in vocabulary if token in term]
+        grams = self._path_grams if path else self._content_grams
+        return grams.containing(token)
+
+    def _candidates(self, token, path=False):
+        """
+        Docs that may contain a token with non-word characters: the docs having,
+        for every word run of the token, a term that contains the run. Runs
+        shorter than a trigram only narrow when there is nothing longer.
+        """
+        runs = TOKEN_RE.findall(token)
+        long_runs = [run for run in runs if len(run) >= GRAM_SIZE]
+        candidates = None
+        for run in long_runs or runs:
+            docs = set()
+            for term in self._terms_containing(run, path):
+                docs.update(self._path_postings[term] if path else self._term_pairs(term)[0::2])
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return set()
+        if candidates is None:
+            return set(self._doc_ids.values())
+        return candidates
+
+    def estimate_bytes(self):
+        """Rough memory estimate of the postings arrays and vocabulary, plus cached positions."""
+        items = len(self._base_pairs) + sum(len(pairs) for pairs in self._postings if pairs is not None)
+        items += sum(len(terms[0]) for terms in self._doc_terms if terms is not None)
+        return (
+            items * self._base_pairs.itemsize + len(self._term_ids) * self.BYTES_PER_TERM
+            + self.positions.used_bytes
+        )
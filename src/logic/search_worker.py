@@ -0,0 +1,92 @@
+import threading
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search that noticed a newer request superseded it."""
+
+
+def check_cancelled(should_cancel):
+    """Raises SearchCancelled if the optional should_cancel callable says so."""
+    if should_cancel is not None and should_cancel():
+        raise SearchCancelled()
+
+
+class SearchWorker:
+    """
+    Runs searches on a single background thread; the newest request wins.
+
+    Every submit() bumps a generation counter. A request still waiting is
+    replaced by the newer one, and the search in flight is cancelled
+    cooperatively: it receives a should_cancel() callable that turns true as
+    soon as a newer request exists, and is expected to raise SearchCancelled
+    (see check_cancelled). Results are only delivered for the generation that
+    was current when the search finished; on_done(generation, result) is
+    called on the worker thread, and the UI must check is_current() again
+    once it is back on the Tk main thread.
+
+    The thread is started on the first submit() and runs until stop(); owners
+    that go away (e.g. a closed overlay) must stop their worker.
+    """
+
+    def __init__(self, name="search"):
+        self.name = name
+        self.generation = 0
+        self._pending = None # (generation, fn, args, kwargs, on_done)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, fn, on_done, *args, **kwargs):
+        """
+        Schedules fn(*args, should_cancel=..., **kwargs), replacing any pending request.
+        Returns the generation of the request.
+        """
+        with self._cond:
+            self.generation += 1
+            self._pending = (self.generation, fn, args, kwargs, on_done)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return self.generation
+
+    def cancel(self):
+        """Drops the pending request and cancels the one in flight."""
+        with self._cond:
+            self.generation += 1
+            self._pending = None
+
+    def stop(self):
+        """Cancels any work and lets the worker thread exit. A later submit() starts a new thread."""
+        with self._cond:
+            self.generation += 1
+            self._pending = None
+            self._thread = None # The running thread notices it was replaced and exits
+            self._cond.notify_all()
+
+    def is_current(self, generation):
+        """True if no newer request was submitted after this generation."""
+        return generation == self.generation
+
+    def _run(self):
+        me = threading.current_thread()
+        while True:
+            with self._cond:
+                while self._pending is None and self._thread is me:
+                    self._cond.wait()
+                if self._thread is not me:
+                    return
+                request, self._pending = self._pending, None
+            self._execute(*request)
+            request = None # Do not keep the last callbacks (and what they reference) alive while idle
+
+    def _execute(self, generation, fn, args, kwargs, on_done):
+        should_cancel = lambda: generation != self.generation
+        try:
+            result = fn(*args, should_cancel=should_cancel, **kwargs)
+        except SearchCancelled:
+            return
+        except Exception as e:
+            print(f"SearchWorker: Search error: {e}")
+            return
+        if not should_cancel():
+            on_done(generation, result)
@@ -0,0 +1,140 @@
+import re
+import threading
+from src.logic.records import SymbolRecord
+
+# Class definitions (functions and methods come from ProjectManager.extract_functions)
+PY_CLASS_RE = re.compile(r'^[ \t]*class\s+([a-zA-Z_]\w*)', re.MULTILINE)
+JS_CLASS_RE = re.compile(r'(?:^|[\s;])class\s+([a-zA-Z_$][\w$]*)', re.MULTILINE)
+
+
+def extract_class_names(content, ext):
+    """Returns the class names defined in content for a '.py' or JS/TS extension."""
+    pattern = PY_CLASS_RE if ext == '.py' else JS_CLASS_RE
+    return pattern.findall(content)
+
+
+class SymbolIndex:
+    """
+    Maps the symbol names a file defines (functions, methods, classes) to
+    the docs defining them, case-insensitively.
+
+    Lookups are a dict access by the lowercased name. Most names are defined
+    by a single file, so those map to the bare doc id instead of a set.
+    """
+
+    def __init__(self):
+        self._docs_by_name = {} # {lowercased name: doc_id, or set(doc_id) if several define it}
+        self._doc_names = {} # {doc_id: (lowercased names)}
+
+    def add(self, doc_id, names):
+        self.remove(doc_id)
+        names = tuple({name.lower() for name in names})
+        if not names:
+            return
+        self._doc_names[doc_id] = names
+        by_name = self._docs_by_name
+        for name in names:
+            docs = by_name.get(name)
+            if docs is None:
+                by_name[name] = doc_id
+            elif isinstance(docs, set):
+                docs.add(doc_id)
+            else:
+                by_name[name] = {docs, doc_id}
+
+    def remove(self, doc_id):
+        by_name = self._docs_by_name
+        for name in self._doc_names.pop(doc_id, ()):
+            docs = by_name.get(name)
+            if isinstance(docs, set):
+                docs.discard(doc_id)
+                if len(docs) == 1:
+                    by_name[name] = next(iter(docs))
+            elif docs == doc_id:
+                del by_name[name]
+
+    def defining(self, name):
+        """Docs that define a symbol with exactly this (lowercased) name (a new set)."""
+        docs = self._docs_by_name.get(name)
+        if docs is None:
+            return set()
+        return set(docs) if isinstance(docs, set) else {docs}
+
+
+class SymbolTable:
+    """
+    The functions extracted from each file, kept across calls.
+
+    Extraction results are stored by content hash (of the file's scan
+    entry) as (name, line, start, end, type, first_line, end_line) tuples, so a file is only
+    parsed again when its content changes, and files with identical content
+    share one extraction. The full list is reused as is while the project
+    generation stays the same. Calls are serialized, so a background build
+    and a caller waiting for it parse every file once.
+    """
+
+    def __init__(self, store):
+        self._store = store # ContentStore the SymbolRecords slice their source from
+        self._by_hash = {} # {content hash: tuple of (name, line, start, end, type, first_line, end_line)}
+        self._files = {} # {path: (content hash, FileRecord, [SymbolRecord])}
+        self._all = None # Flat list of the last call
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def is_current(self, generation):
+        """True if functions() for this generation returns the cached list without parsing."""
+        return self._all is not None and self._generation == generation
+
+    def functions(self, generation, files, content_hash, extract, stored=None):
+        """
+        Returns the SymbolRecords of files, in order. content_hash(file) is the hash
+        of its content (None if unknown: always extracted) and extract(file) parses it.
+        stored optionally maps content hashes to symbol tuples saved by an earlier
+        session (see symbols); those files are not parsed again.
+        The returned list is shared, callers must not modify it.
+        """
+        with self._lock:
+            if stored:
+                for digest, symbols in stored.items():
+                    self._by_hash.setdefault(digest, symbols)
+            return self._functions(generation, files, content_hash, extract)
+
+    def symbols(self, digest):
+        """The symbol tuples extracted from the content with this hash, or None (e.g. to persist them)."""
+        return self._by_hash.get(digest)
+
+    def _functions(self, generation, files, content_hash, extract):
+        if self._all is not None and generation == self._generation:
+            return self._all
+
+        all_records = []
+        files_seen = {}
+        parsed = 0
+        for f in files:
+            digest = content_hash(f)
+            cached = self._files.get(f['path'])
+            if (digest is not None and cached is not None and cached[0] == digest and cached[1] is f
+                    and not (cached[2] and cached[2][0].is_stale)):
+                records = cached[2]
+            elif digest is not None and digest in self._by_hash:
+                records = [SymbolRecord(name, f, line, start, end, self._store, *rest)
+                           for name, line, start, end, *rest in self._by_hash[digest]]
+            else:
+                records = extract(f)
+                parsed += 1
+                if digest is not None:
+                    self._by_hash[digest] = tuple(
+                        (r.name, r.line, r.start, r.end, r.type, r.first_line, r.end_line) for r in records
+                    )
+            files_seen[f['path']] = (digest, f, records)
+            all_records.extend(records)
+
+        # Forget files and contents that are gone
+        self._files = files_seen
+        live = {entry[0] for entry in files_seen.values()}
+        self._by_hash = {digest: symbols for digest, symbols in self._by_hash.items() if digest in live}
+        self._all = all_records
+        self._generation = generation
+        if parsed:
+            print(f"SymbolTable: Parsed {parsed} of {len(files_seen)} files ({len(all_records)} functions)")
+        return all_records
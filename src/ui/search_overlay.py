@@ -1,5 +1,7 @@
+import re
 import tkinter as tk
 from src.ui.styles import Styles
+from src.logic.search_worker import SearchWorker
 
 
 TYPE_ICONS = {
@@ -9,6 +11,7 @@ TYPE_ICONS = {
     'file':     '📁',
     'function': 'λ',
     'command':  '🐚',
+    'grep':     '🔎',
 }
 
 TYPE_LABELS = {
@@ -18,6 +21,7 @@ TYPE_LABELS = {
     'file':     'Fichero',
     'function': 'Función',
     'command':  'Comando',
+    'grep':     'Grep',
 }
 
 
@@ -35,6 +39,12 @@ class SearchOverlay(tk.Toplevel):
         self.all_assets = []
         self.filtered = []
         self.selected_index = 0
+        self.grep_worker = SearchWorker("grep")
+        self._grep_token = None # Identifies the running grep; hits of older ones are dropped
+        self._grep_pattern = None
+        self._functions = None # Last list from controller.get_all_functions()
+        self._function_names = [] # Its lowercased names, for filtering
+        self._functions_pending = False # A background extraction was requested
 
         # --- Window configuration ---
         self.overrideredirect(True)  # No window decorations
@@ -154,15 +164,26 @@ class SearchOverlay(tk.Toplevel):
         raw_query = self.entry.get()
         query = raw_query.lower()
 
+        if query.startswith("grep:"):
+            # Regex search over the project content, streamed from a background search
+            self._start_grep(raw_query[len("grep:"):].strip())
+            return
+        self._cancel_grep()
+
         if query.startswith("funcion:"):
             # Function search mode
             search_term = query[len("funcion:"):].strip()
-            all_functions = self.controller.get_all_functions()
-            if not search_term:
-                self.filtered = all_functions
+            functions = self._get_functions()
+            if functions is None:
+                self.filtered = []
+                self._update_status("⏳ Cargando funciones...")
             else:
-                self.filtered = [f for f in all_functions if search_term in f['name'].lower()]
-            self._update_status(f"🔍 Modo Función: {len(self.filtered)} encontradas")
+                all_functions, names = functions
+                if not search_term:
+                    self.filtered = list(all_functions)
+                else:
+                    self.filtered = [f for f, name in zip(all_functions, names) if search_term in name]
+                self._update_status(f"🔍 Modo Función: {len(self.filtered)} encontradas")
         elif query.startswith(">"):
             # Explicit command mode (optional prefix)
             search_term = query[1:].strip()
@@ -183,6 +204,94 @@ class SearchOverlay(tk.Toplevel):
         self.selected_index = 0
         self._update_listbox()
 
+    def _get_functions(self):
+        """
+        Project functions and their lowercased names, or None while they are being
+        extracted in the background (the list refreshes itself when they are ready).
+        The controller returns the same cached list until the project changes, so
+        names are only lowercased again then.
+        """
+        if not self.controller.functions_ready():
+            if not self._functions_pending:
+                self._functions_pending = True
+                self.controller.prepare_functions(lambda functions: self._schedule(self._on_functions_ready))
+            return None
+        functions = self.controller.get_all_functions()
+        if functions is not self._functions:
+            self._functions = functions
+            self._function_names = [f['name'].lower() for f in functions]
+        return self._functions, self._function_names
+
+    def _on_functions_ready(self):
+        self._functions_pending = False
+        if self.entry.get().lower().startswith("funcion:"):
+            self._on_key_release()
+
+    # --- Grep mode ---
+    def _start_grep(self, pattern):
+        """Starts a background grep of pattern; hits are appended to the list as they arrive."""
+        if pattern == self._grep_pattern:
+            return # Same pattern (e.g. a modifier key was released), keep the running search
+        self._cancel_grep()
+        self._grep_pattern = pattern
+        self.filtered = []
+        self.selected_index = 0
+        self._update_listbox()
+        if not pattern:
+            self._update_status("🔎 Modo Grep: escribe una expresión regular")
+            return
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            self._update_status(f"❌ Expresión regular no válida: {e}")
+            return
+
+        token = self._grep_token = object()
+        self._update_status("🔎 Modo Grep: buscando...")
+        self.grep_worker.submit(
+            self.controller.grep_project,
+            lambda generation, result: self._schedule(self._on_grep_done, token, result),
+            pattern,
+            on_hits=lambda hits: self._schedule(self._on_grep_hits, token, hits),
+        )
+
+    def _schedule(self, fn, *args):
+        """Runs fn on the Tk main thread (called from a worker thread); ignored once the overlay is gone."""
+        try:
+            self.after(0, fn, *args)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _cancel_grep(self):
+        if self._grep_token is not None:
+            self.grep_worker.cancel()
+        self._grep_token = None
+        self._grep_pattern = None
+
+    def _on_grep_hits(self, token, hits):
+        if token is not self._grep_token:
+            return
+        shown = len(self.filtered)
+        for rel_path, path, line, column, preview in hits:
+            self.filtered.append({
+                'name': f"{rel_path}:{line}:{column}",
+                'type': 'grep',
+                'path': path,
+                'file_rel_path': rel_path,
+                'line': line,
+                'preview': preview,
+            })
+        if shown < self.MAX_VISIBLE: # Only redraw while the visible rows change
+            self._update_listbox()
+        self._update_status(f"🔎 Modo Grep: {len(self.filtered)} coincidencias...")
+
+    def _on_grep_done(self, token, result):
+        if token is not self._grep_token:
+            return
+        count, truncated = result
+        suffix = " (límite alcanzado)" if truncated else ""
+        self._update_status(f"🔎 Modo Grep: {count} coincidencias{suffix}")
+
     def _update_listbox(self):
         self.listbox.delete(0, tk.END)
         for asset in self.filtered[:self.MAX_VISIBLE]:
@@ -191,6 +300,8 @@ class SearchOverlay(tk.Toplevel):
             if asset['type'] == 'function':
                 # Show function name and its source file
                 display = f"{icon}  {asset['name']}   ({asset['file_rel_path']})   [{label}]"
+            elif asset['type'] == 'grep':
+                display = f"{icon}  {asset['name']}   {asset['preview']}"
             else:
                 display = f"{icon}  {asset['name']}   [{label}]"
             self.listbox.insert(tk.END, display)
@@ -263,6 +374,11 @@ class SearchOverlay(tk.Toplevel):
             return
 
         if asset['type'] == 'function':
+            if asset.is_stale:
+                # The file changed since the list was built: offer the current functions instead
+                self._on_key_release()
+                self._update_status("⚠️ El archivo ha cambiado, lista de funciones actualizada")
+                return
             self._update_status("⏳ Copiando función...")
             self.update_idletasks()
             
@@ -303,6 +419,8 @@ class SearchOverlay(tk.Toplevel):
     
     # En src/ui/search_overlay.py, modificar el método _close
     def _close(self):
+        self._cancel_grep()
+        self.grep_worker.stop()
         # Restaurar el foco a la ventana principal antes de destruir
         try:
             if self.master and self.master.winfo_exists():
@@ -1,10 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
 import tkinter.messagebox as messagebox
-import threading
 import os
 import webbrowser
 from src.ui.styles import Styles
+from src.logic.search_worker import SearchWorker
 
 class CodeView(ttk.Frame):
     """
@@ -60,6 +60,7 @@ class CodeView(ttk.Frame):
              pass 
         
         self._last_selected_section = None
+        self.search_worker = SearchWorker("code-search") # Newest search wins, older ones are cancelled
 
         self._create_layout()
 
@@ -576,7 +577,7 @@ class CodeView(ttk.Frame):
              limit = 20
 
         for f in files[:limit]:
-            size_kb = f"{len(f['content']) / 1024:.1f} KB"
+            size_kb = f"{f['size'] / 1024:.1f} KB"
             # Format path to show only parent/filename
             rel_path = f['rel_path']
             parts = rel_path.split(os.sep)
@@ -588,6 +589,13 @@ class CodeView(ttk.Frame):
             self.tree.insert("", "end", values=(display_path, size_kb), tags=(f['path'],))
 
 
+    def on_project_files_changed(self, summary):
+        """Called (Main Thread) when the project watcher applied file changes."""
+        changed = len(summary['added']) + len(summary['modified']) + len(summary['deleted'])
+        print(f"CodeView: {changed} ficheros cambiados, actualizando lista.")
+        # Re-run the current search so the list reflects the new files without a rescan
+        self._on_prompt_change()
+
     def _on_prompt_change(self, event=None):
         """Handles real-time search filtering with debouncing."""
         if hasattr(self, '_search_timer') and self._search_timer:
@@ -597,29 +605,38 @@ class CodeView(ttk.Frame):
         self._search_timer = self.after(300, self._start_background_search)
 
     def _start_background_search(self):
-        """Starts the search in a separate thread."""
+        """Submits the search to the background worker (supersedes any search still running)."""
         text = self.txt_prompt.get("1.0", "end-1c").strip()
         
         selected_indices = self.section_list.curselection()
         section = self.section_list.get(selected_indices[0]) if selected_indices else None
         
         extension = self.ext_var.get()
-        
-        # Run search in thread
-        threading.Thread(target=self._perform_search, args=(text, section, extension), daemon=True).start()
 
-    def _perform_search(self, text, section, extension="Todos"):
-        """Executes search logic (Thread Safe)."""
+        # Only the files the list can show are ranked
         try:
-            relevant_files = self.controller.get_relevant_files_for_ui(text, selected_section=section, extension=extension)
-            # Schedule UI update on main thread
-            self.after(0, lambda: self._update_file_list_safe(relevant_files))
-        except Exception as e:
-            print(f"Search error: {e}")
+            limit = int(self.limit_var.get())
+        except:
+            limit = 20
+        
+        self.search_worker.submit(
+            self.controller.get_relevant_files_for_ui, self._on_search_done,
+            text, selected_section=section, extension=extension, limit=limit
+        )
+
+    def _on_search_done(self, generation, result):
+        """Called on the search thread with the results of a finished search."""
+        relevant_files, total = result
+        # Schedule UI update on main thread
+        self.after(0, lambda: self._update_file_list_safe(relevant_files, generation, total))
 
-    def _update_file_list_safe(self, files):
-        """Updates UI with search results (Main Thread)."""
+    def _update_file_list_safe(self, files, generation=None, total=None):
+        """Updates UI with search results (Main Thread). Results of superseded searches are dropped."""
+        if generation is not None and not self.search_worker.is_current(generation):
+            return
         self.refresh_file_list(files)
+        if total is not None:
+            self.lbl_limit.config(text=f"Límite: {int(self.limit_var.get())} ({total} coincidencias)")
         self.update_idletasks()
 
     def _on_section_select(self, event=None):
@@ -864,15 +881,13 @@ class CodeView(ttk.Frame):
             return
 
         selected_files_data = []
-        all_files = self.controller.project_manager.get_files()
-        files_map = {f['path']: f for f in all_files}
-        
         for item in items_to_process:
             tags = self.tree.item(item, 'tags')
             if tags:
                 file_path = tags[0] if isinstance(tags, (list, tuple)) else tags
-                if file_path in files_map:
-                    selected_files_data.append(files_map[file_path])
+                file_data = self.controller.project_manager.get_file_by_path(file_path)
+                if file_data is not None:
+                    selected_files_data.append(file_data)
         
         if not selected_files_data:
             messagebox.showwarning("Aviso", "No se han encontrado datos para los ficheros procesados.")
@@ -890,7 +905,7 @@ class CodeView(ttk.Frame):
             prompt = f"Petición del Usuario: {prompt_instruction}\n\nArchivos de Contexto:\n"
             for f in selected_files_data:
                 prompt += f"\n--- Archivo: {f['rel_path']} ---\n"
-                prompt += f.get('content', '') + "\n"
+                prompt += self.controller.project_manager.get_file_content(f) + "\n"
 
             # 3. Save to Documents/codigo.txt
             success, result = self.controller.save_content_to_codigo_txt(prompt, append=False)